@@ -0,0 +1,98 @@
+"""
+Compares the compiled `dataclass_from_dict` converters against the original,
+uncached implementation on a custom deck with 10k cards.
+
+    python -m ttgen._benchmarks.bench_dataclass_ [count]
+"""
+import sys
+import timeit
+from dataclasses import fields, is_dataclass
+
+from ttgen.dataclass_ import dataclass_from_dict
+
+
+def legacy_dataclass_from_dict(class_, **d):
+    """
+    The original implementation, inspecting the fields on every call.
+    """
+
+    def _dataclass_from_dict(klass, d):
+
+        if is_dataclass(d):
+            return d
+
+        try:
+            fields_ = fields(klass)
+        except TypeError:
+            origin = getattr(klass, '__origin__', None)
+
+            if origin is list:
+                value_klass = klass.__args__[0]
+                return [
+                    _dataclass_from_dict(value_klass, i)
+                    for i in d
+                ]
+
+            if origin is dict:
+                value_klass = klass.__args__[1]
+                return {
+                    i: _dataclass_from_dict(value_klass, j)
+                    for i, j in d.items()
+                }
+
+            return d  # Not a dataclass field
+        else:
+            fieldtypes = {f.name: f.type for f in fields_}
+            return klass(
+                **{i: _dataclass_from_dict(fieldtypes[i], j) for i, j in d.items()}
+            )
+
+    return _dataclass_from_dict(class_, d)
+
+
+def create_deck(from_dict, count):
+    """
+    Creates a custom deck the way the generator does, converting every card
+    and then the deck itself.
+    """
+    from ttgen.tabletop_simulator import TabletopCard, TabletopDeckCustom
+
+    cards = [
+        from_dict(
+            TabletopCard,
+            CardID=100 + i,
+            GUID=f"{i:06x}",
+            Transform=dict(posY=2.0, rotY=180.0),
+        )
+        for i in range(count)
+    ]
+    return from_dict(
+        TabletopDeckCustom,
+        Nickname="Benchmark",
+        Transform=dict(posY=2.0, rotY=180.0, rotZ=180.0),
+        DeckIDs=[i.CardID for i in cards],
+        CustomDeck={
+            "1": dict(FaceURL="face.jpg", BackURL="back.jpg", NumWidth=10, NumHeight=7),
+        },
+        ContainedObjects=cards,
+    )
+
+
+def main(count=10000, repeat=5):
+    assert create_deck(legacy_dataclass_from_dict, count) == create_deck(dataclass_from_dict, count)
+
+    print(f"TabletopDeckCustom with {count} cards (best of {repeat}):")
+    results = {}
+    for i_name, i_function in (
+        ("legacy", legacy_dataclass_from_dict),
+        ("compiled", dataclass_from_dict),
+    ):
+        results[i_name] = min(
+            timeit.repeat(lambda: create_deck(i_function, count), number=1, repeat=repeat)
+        )
+        print(f"  {i_name:10} {results[i_name] * 1000.0:10.2f} ms")
+    print(f"  speedup    {results['legacy'] / results['compiled']:10.2f}x")
+
+
+if __name__ == "__main__":
+    main(*[int(i) for i in sys.argv[1:]])
@@ -0,0 +1,59 @@
+"""
+Compares the size and write time of the save output formats on a synthetic
+save with custom decks.
+
+    python -m ttgen._benchmarks.bench_save [decks] [cards per deck]
+"""
+import sys
+import tempfile
+import timeit
+from pathlib import Path
+
+
+FORMATS = [
+    ("indented", dict()),
+    ("compact", dict(compact=True)),
+    ("compact, skip defaults", dict(compact=True, skip_defaults=True)),
+]
+
+
+def create_save(decks, cards):
+    from ttgen.tabletop_simulator import TabletopCard, TabletopDeckCustom, TabletopSimulator
+
+    result = TabletopSimulator()
+    for i_deck in range(1, decks + 1):
+        result.ObjectStates.append(
+            TabletopDeckCustom.from_dict(
+                Nickname=f"deck_{i_deck}",
+                DeckIDs=[100 * i_deck + i for i in range(cards)],
+                CustomDeck={str(i_deck): dict(FaceURL="face.jpg", BackURL="back.jpg")},
+                ContainedObjects=[
+                    TabletopCard(CardID=100 * i_deck + i, GUID=f"{i:06x}")
+                    for i in range(cards)
+                ],
+            )
+        )
+    return result
+
+
+def main(decks=10, cards=500, repeat=5):
+    ttsim = create_save(decks, cards)
+
+    print(f"{decks} decks with {cards} cards (best of {repeat}):")
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        filename = Path(tmp_dir) / "save.json"
+        base_size = None
+        for i_name, i_options in FORMATS:
+            elapsed = min(
+                timeit.repeat(lambda: ttsim.save(filename, **i_options), number=1, repeat=repeat)
+            )
+            size = filename.stat().st_size
+            base_size = base_size or size
+            print(
+                f"  {i_name:24} {size / 1024.0:10.1f} KiB ({size / base_size:6.1%})"
+                f" {elapsed * 1000.0:10.2f} ms"
+            )
+
+
+if __name__ == "__main__":
+    main(*[int(i) for i in sys.argv[1:]])
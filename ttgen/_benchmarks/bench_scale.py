@@ -0,0 +1,152 @@
+"""
+Times the compile phases (YAML load, component parse, layout, generate and
+save) on synthetic specs of increasing scale, and compares them against the
+stored baselines.
+
+    python -m ttgen._benchmarks.bench_scale [scale ...] [--repeat N] [--save]
+
+The scales are named in `SCALES`, all of them run when none is given. Each
+process compiles the smallest scale once, untimed, before the timed runs.
+
+The baselines (`baselines.json`, best seconds per scale and phase) are only
+meaningful on the machine they were saved on, so they aren't committed: save
+them before a change with `--save`, then run again after it.
+"""
+import argparse
+import contextlib
+import json
+import math
+import os
+import tempfile
+from pathlib import Path
+
+
+# name: (decks, cards per deck, layout nesting depth)
+SCALES = {
+    "small": (10, 50, 2),
+    "cards": (10, 5000, 2),
+    "deep": (100, 50, 12),
+    "decks": (1000, 50, 4),
+    "large": (1000, 500, 6),
+    "huge": (10000, 50, 8),
+}
+
+PHASES = ["load", "parse", "layout", "generate", "save"]
+
+BASELINES_FILENAME = Path(__file__).parent / "baselines.json"
+
+# Slowdown over the baseline reported as a regression.
+THRESHOLD = 1.2
+
+
+def create_spec(decks, cards, depth):
+    """
+    Creates the spec YAML of a game with the given number of decks, laid out
+    in OpenDecks nested `depth` levels deep in alternating VerticalBox and
+    HorizontalBox.
+    """
+    import yaml
+
+    components = {}
+    items = []
+    for i_deck in range(decks):
+        name = f"deck_{i_deck}"
+        components[name] = {
+            "__class__": "Deck",
+            "face_url": f"https://example.com/{name}.jpg",
+            "back_url": "https://example.com/back.jpg",
+            "count": cards,
+        }
+        items.append({"__class__": "OpenDeck", "deck": name, "count": 4})
+
+    # The same number of boxes on each level, so the tree is balanced.
+    fan_out = max(2, math.ceil(decks ** (1.0 / depth)))
+    for i_level in range(depth):
+        class_ = "VerticalBox" if i_level % 2 else "HorizontalBox"
+        items = [
+            {"__class__": class_, "items": items[i:i + fan_out]}
+            for i in range(0, len(items), fan_out)
+        ]
+
+    spec = {"name": "Benchmark", "components": components, "layout": items}
+    return yaml.safe_dump(spec, sort_keys=False)
+
+
+def run(spec, directory):
+    """
+    Compiles the given spec YAML on the given directory.
+
+    :return: (phase, seconds) rows.
+    """
+    from ttgen.cli import TabletopGenerator
+    from ttgen.timings import Timings
+
+    timings = Timings()
+    with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+        ttg = TabletopGenerator(directory / "spec.yaml", source=spec, timings=timings)
+        with timings.phase("generate"):
+            ttsim = ttg.generate(use_cache=False, guids="deterministic")
+        with timings.phase("save"):
+            ttsim.save(directory / "Benchmark.json")
+    return timings.report()
+
+
+def load_baselines():
+    if not BASELINES_FILENAME.is_file():
+        return {}
+    return json.loads(BASELINES_FILENAME.read_text())
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="bench_scale")
+    parser.add_argument("scales", nargs="*", help=f"Any of: {', '.join(SCALES)}.")
+    parser.add_argument("--repeat", type=int, default=3)
+    parser.add_argument("--save", action="store_true", help="Stores the results as baselines.")
+    args = parser.parse_args(argv)
+    for i_scale in args.scales:
+        if i_scale not in SCALES:
+            parser.error(f"Invalid scale: {i_scale}.")
+
+    baselines = load_baselines()
+    regressions = []
+    with tempfile.TemporaryDirectory() as tmp_dir:
+        # Warm-up: the first run pays for the imports and the schema builds.
+        run(create_spec(*SCALES["small"]), Path(tmp_dir))
+
+        for i_scale in args.scales or list(SCALES):
+            decks, cards, depth = SCALES[i_scale]
+            spec = create_spec(decks, cards, depth)
+
+            best = {}
+            for _ in range(args.repeat):
+                for j_phase, j_seconds in run(spec, Path(tmp_dir)):
+                    best[j_phase] = min(best.get(j_phase, j_seconds), j_seconds)
+
+            print(
+                f"{i_scale}: {decks} decks with {cards} cards, depth {depth}"
+                f" (best of {args.repeat}):"
+            )
+            baseline = baselines.get(i_scale, {})
+            for j_phase in PHASES:
+                line = f"  {j_phase:10} {best[j_phase] * 1000.0:10.2f} ms"
+                if j_phase in baseline:
+                    ratio = best[j_phase] / baseline[j_phase]
+                    line += f" ({ratio:5.2f}x baseline)"
+                    if ratio > THRESHOLD:
+                        line += " REGRESSION"
+                        regressions.append(f"{i_scale}/{j_phase}")
+                print(line)
+
+            if args.save:
+                baselines[i_scale] = {i: round(best[i], 6) for i in PHASES}
+
+    if args.save:
+        BASELINES_FILENAME.write_text(json.dumps(baselines, indent=2) + "\n")
+        print(f"Baselines saved to {BASELINES_FILENAME}.")
+    elif regressions:
+        print(f"Regressions (over {THRESHOLD}x): {', '.join(regressions)}")
+    return 1 if regressions and not args.save else 0
+
+
+if __name__ == "__main__":
+    raise SystemExit(main())
@@ -0,0 +1,78 @@
+import contextlib
+import io
+
+import pytest
+
+from ttgen.cli import TabletopGenerator
+from ttgen.tabletop_generator.assets import AssetIndex, MissingAssetsError
+
+
+def test_asset_index(tmp_path):
+    paths = (
+        "decks/cards.jpg", "decks/cards.png", "boards/main.jpeg", "boards/Side.PNG",
+        ".ttgen-cache/x.png",
+    )
+    for i_path in paths:
+        (tmp_path / i_path).parent.mkdir(exist_ok=True)
+        (tmp_path / i_path).write_bytes(b"")
+
+    index = AssetIndex(tmp_path)
+    assert index.find("decks/cards") == tmp_path / "decks/cards.png"
+    assert index.find("boards/main") == tmp_path / "boards/main.jpeg"
+    assert index.find(".ttgen-cache/x") is None
+    # The lookup ignores case, the found filename keeps it.
+    assert index.find("boards/side") == tmp_path / "boards/Side.PNG"
+
+    index = AssetIndex(tmp_path, extensions=[".jpg", ".png"])
+    assert index.find("decks/cards") == tmp_path / "decks/cards.jpg"
+    assert index.find("boards/main") is None
+
+    assert index.resolve("boards/main") is None
+    assert index.resolve("decks/other") is None
+    with pytest.raises(MissingAssetsError) as e:
+        index.check()
+    assert e.value.paths == ["boards/main", "decks/other"]
+
+
+SPEC = """
+name: Alpha
+components:
+  table:
+    __class__: FlexTable
+  main:
+    __class__: Board
+  cards:
+    __class__: Deck
+  gold:
+    __class__: TokenStack
+"""
+
+
+def test_missing_assets(tmp_path):
+    (tmp_path / "decks").mkdir()
+    (tmp_path / "decks" / "cards.jpg").write_bytes(b"")
+    spec_filename = tmp_path / "alpha.yaml"
+    spec_filename.write_text(SPEC)
+
+    with pytest.raises(MissingAssetsError) as e, contextlib.redirect_stdout(io.StringIO()):
+        TabletopGenerator(spec_filename).compile(tmp_path)
+    assert e.value.paths == ["boards/main", "decks/cards_back", "tokenstacks/gold"]
+
+
+def test_spec_asset_extensions(tmp_path):
+    (tmp_path / "decks").mkdir()
+    for i_name in ("cards.png", "cards_back.png", "cards.jpg"):
+        (tmp_path / "decks" / i_name).write_bytes(b"")
+    spec_filename = tmp_path / "alpha.yaml"
+    spec_filename.write_text(
+        "name: Alpha\n"
+        "asset_extensions: .png\n"
+        "components:\n"
+        "  cards:\n"
+        "    __class__: Deck\n"
+    )
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        ttg = TabletopGenerator(spec_filename)
+        assert ttg.asset_extensions == [".png"]
+        ttg.compile(tmp_path)
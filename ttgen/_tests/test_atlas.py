@@ -0,0 +1,105 @@
+import contextlib
+import io
+import json
+
+import pytest
+
+from ttgen.tabletop_generator.atlas import build_atlas, plan_sheets
+
+
+def test_plan_sheets(tmp_path):
+    cards = [tmp_path / f"{i:03d}.png" for i in range(150)]
+
+    sheets = plan_sheets(cards, tmp_path, "deck")
+    assert [(i.filename.name, len(i.cards), i.num_width, i.num_height) for i in sheets] == [
+        ("deck_1.jpg", 69, 10, 7),
+        ("deck_2.jpg", 69, 10, 7),
+        ("deck_3.jpg", 12, 10, 2),
+    ]
+    assert sheets[1].cards[0] == cards[69]
+
+    [sheet] = plan_sheets(cards[:3], tmp_path, "deck")
+    assert (sheet.num_width, sheet.num_height) == (3, 2)
+
+
+def _create_cards(cards_dir, count):
+    Image = pytest.importorskip("PIL.Image")
+
+    cards_dir.mkdir(parents=True)
+    for i in range(count):
+        Image.new("RGB", (4, 6), (i, 0, 0)).save(cards_dir / f"card_{i:03d}.png")
+
+
+def test_build_atlas(tmp_path):
+    _create_cards(tmp_path / "cards", 70)
+    from PIL import Image
+
+    sheets = build_atlas(tmp_path / "cards", tmp_path / "atlases", "deck")
+    assert [i.filename.name for i in sheets] == ["deck_1.jpg", "deck_2.jpg"]
+    with Image.open(sheets[0].filename) as sheet:
+        assert sheet.size == (40, 42)
+    with Image.open(sheets[1].filename) as sheet:
+        assert sheet.size == (8, 12)
+
+    # Only the sheets with changed cards are built again.
+    mtimes = [i.filename.stat().st_mtime_ns for i in sheets]
+    Image.new("RGB", (4, 6), (0, 255, 0)).save(tmp_path / "cards" / "card_069.png")
+    sheets = build_atlas(tmp_path / "cards", tmp_path / "atlases", "deck")
+    assert sheets[0].filename.stat().st_mtime_ns == mtimes[0]
+    assert sheets[1].filename.stat().st_mtime_ns != mtimes[1]
+
+
+SPEC = """
+name: Alpha
+components:
+  table:
+    __class__: FlexTable
+  cards:
+    __class__: Deck
+    cards_dir: cards/alpha
+"""
+
+
+def test_deck_atlas(tmp_path):
+    from ttgen.cli import TabletopGenerator
+
+    _create_cards(tmp_path / "cards" / "alpha", 75)
+    (tmp_path / "decks").mkdir()
+    (tmp_path / "decks" / "cards_back.jpg").write_bytes(b"")
+    spec_filename = tmp_path / "alpha.yaml"
+    spec_filename.write_text(SPEC)
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        TabletopGenerator(spec_filename).compile(tmp_path)
+
+    save = json.loads((tmp_path / "Alpha.json").read_text())
+    deck = next(i for i in save["ObjectStates"] if i["Name"] == "DeckCustom")
+    custom_deck = [
+        (i, j["FaceURL"].split("\\")[-1], j["NumWidth"], j["NumHeight"])
+        for i, j in deck["CustomDeck"].items()
+    ]
+    assert custom_deck == [
+        ("1", "cards_1.jpg", 10, 7),
+        ("2", "cards_2.jpg", 6, 2),
+    ]
+    assert len(deck["ContainedObjects"]) == 75
+    assert deck["DeckIDs"][68:70] == [168, 200]
+
+    # Adding a card image regenerates the deck, though no cached file changed.
+    Image = pytest.importorskip("PIL.Image")
+    Image.new("RGB", (4, 6)).save(tmp_path / "cards" / "alpha" / "card_075.png")
+    with contextlib.redirect_stdout(io.StringIO()):
+        TabletopGenerator(spec_filename).compile(tmp_path)
+
+    save = json.loads((tmp_path / "Alpha.json").read_text())
+    deck = next(i for i in save["ObjectStates"] if i["Name"] == "DeckCustom")
+    assert len(deck["ContainedObjects"]) == 76
+
+    # Optimized images include the sheets.
+    Image.new("RGB", (4, 6)).save(tmp_path / "decks" / "cards_back.jpg")
+    with contextlib.redirect_stdout(io.StringIO()):
+        TabletopGenerator(spec_filename).compile(tmp_path, optimize_images=True, max_texture=16)
+
+    save = json.loads((tmp_path / "Alpha.json").read_text())
+    deck = next(i for i in save["ObjectStates"] if i["Name"] == "DeckCustom")
+    assert "\\.ttgen-cache\\images\\" in deck["CustomDeck"]["1"]["FaceURL"]
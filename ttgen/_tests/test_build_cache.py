@@ -0,0 +1,81 @@
+import contextlib
+import io
+
+from ttgen.cli import TabletopGenerator
+from ttgen.tabletop_generator.build_cache import BuildCache
+
+
+SPEC = """
+name: Alpha
+components:
+  table:
+    __class__: FlexTable
+  cards:
+    __class__: Deck
+    count: 3
+  gold:
+    __class__: TokenStack
+"""
+
+
+def _compile(spec_filename, output_dir):
+    oss = io.StringIO()
+    with contextlib.redirect_stdout(oss):
+        TabletopGenerator(spec_filename).compile(output_dir)
+    return oss.getvalue()
+
+
+def test_build_cache(tmp_path):
+    for i_path in ("decks/cards.jpg", "decks/cards_back.jpg", "tokenstacks/gold.png"):
+        (tmp_path / i_path).parent.mkdir(exist_ok=True)
+        (tmp_path / i_path).write_bytes(i_path.encode())
+    spec_filename = tmp_path / "alpha.yaml"
+    spec_filename.write_text(SPEC)
+    output_dir = tmp_path / "output"
+    output_dir.mkdir()
+
+    assert "Build cache: 0 hits, 3 misses." in _compile(spec_filename, output_dir)
+    contents = (output_dir / "Alpha.json").read_text()
+
+    output = _compile(spec_filename, output_dir)
+    assert "Build cache: 3 hits, 0 misses." in output
+    assert "Alpha.json is up to date." in output
+
+    # Changing an image regenerates the components using it.
+    (tmp_path / "tokenstacks/gold.png").write_bytes(b"changed")
+    assert "Build cache: 2 hits, 1 misses." in _compile(spec_filename, output_dir)
+    assert (output_dir / "Alpha.json").read_text() != contents
+
+    # And so does changing the component spec.
+    spec_filename.write_text(SPEC.replace("count: 3", "count: 4"))
+    assert "Build cache: 2 hits, 1 misses." in _compile(spec_filename, output_dir)
+
+
+def test_build_cache_key(tmp_path):
+    from ttgen.tabletop_generator.components import Deck
+    from ttgen.tabletop_generator.context import CompileContext
+
+    context = CompileContext(tmp_path)
+    a = Deck.from_dict({"count": "3"}, "cards")
+    b = Deck.from_dict({"count": "3"}, "cards")
+    c = Deck.from_dict({"count": "4"}, "cards")
+    assert BuildCache.get_key(a, context) == BuildCache.get_key(b, context)
+    assert BuildCache.get_key(a, context) != BuildCache.get_key(c, context)
+
+
+def test_build_cache_unwritable(tmp_path, capsys):
+    from ttgen.tabletop_generator.build_cache import CACHE_DIRNAME
+
+    for i_path in ("decks/cards.jpg", "decks/cards_back.jpg", "tokenstacks/gold.png"):
+        (tmp_path / i_path).parent.mkdir(exist_ok=True)
+        (tmp_path / i_path).write_bytes(i_path.encode())
+    spec_filename = tmp_path / "alpha.yaml"
+    spec_filename.write_text(SPEC)
+    # The cache directory can't be created.
+    (tmp_path / CACHE_DIRNAME).write_bytes(b"")
+
+    TabletopGenerator(spec_filename).compile(tmp_path)
+    assert (tmp_path / "Alpha.json").is_file()
+    assert capsys.readouterr().err.count("Build cache entries not stored") == 1
+    # No temporary file left behind.
+    assert not list(tmp_path.glob("*.tmp"))
@@ -0,0 +1,98 @@
+import json
+
+import pytest
+
+from ttgen.tabletop_generator.card_tables import read_card_texts, read_rows
+from ttgen.tabletop_generator.components import Deck
+from ttgen.tabletop_generator.context import CompileContext
+
+
+COLUMNS = {"name": "str", "cost": "int", "rare": "bool"}
+
+
+def test_read_rows(tmp_path):
+    csv_filename = tmp_path / "cards.csv"
+    csv_filename.write_text("name,cost,rare\nAce,1,yes\nKing,3,no\n")
+    yaml_filename = tmp_path / "cards.yaml"
+    yaml_filename.write_text(
+        "- [name, cost, rare]\n"
+        "- [Ace, 1, yes]\n"
+        "- {name: King, cost: 3, rare: false}\n"
+    )
+
+    expected = [
+        {"name": "Ace", "cost": 1, "rare": True},
+        {"name": "King", "cost": 3, "rare": False},
+    ]
+    assert list(read_rows(csv_filename, COLUMNS)) == expected
+    assert list(read_rows(yaml_filename, COLUMNS)) == expected
+
+
+@pytest.mark.parametrize(
+    "contents, count, error",
+    [
+        ("name,cost\nAce,1\n", 1, "expected the columns name, cost, rare"),
+        ("name,cost,rare\nAce,one,no\n", 1, r"cards.csv:2: invalid int for column cost: 'one'"),
+        ("name,cost,rare\nAce,1\n", 1, r"cards.csv:2: missing value for column rare"),
+        ("name,cost,rare\nAce,1,no,x\n", 1, r"cards.csv:2: 4 values for 3 columns"),
+        ("name,cost,rare\nAce,1,no\n", 2, "1 rows for 2 cards"),
+        ("name,cost,rare\nAce,1,no\nKing,3,no\n", 1, "more rows than cards"),
+    ],
+)
+def test_read_rows_errors(tmp_path, contents, count, error):
+    filename = tmp_path / "cards.csv"
+    filename.write_text(contents)
+
+    with pytest.raises(ValueError, match=error):
+        list(read_card_texts(filename, COLUMNS, count))
+    with pytest.raises(ValueError, match="Unknown card table columns: power"):
+        list(read_card_texts(filename, COLUMNS, count, "{name} ({power})"))
+
+
+@pytest.mark.parametrize(
+    "contents, error",
+    [
+        (
+            "# Cards\n- [name, cost, rare]\n\n- [Ace, 1, yes]\n- [King, three, no]\n",
+            r"cards.yaml:5: invalid int for column cost: 'three'",
+        ),
+        (
+            "- name: Ace\n  cost: 1\n  rare: yes\n- name: King\n  cost: 3\n",
+            r"cards.yaml:4: expected the columns name, cost, rare",
+        ),
+        ("- [name, cost, rare]\n- [Ace, 1]\n", r"cards.yaml:2: 2 values for 3 columns"),
+        ("- [name, cost, rare]\n- Ace\n", r"cards.yaml:2: expected a mapping"),
+        ("name: Ace\n", r"cards.yaml: expected a list of rows"),
+    ],
+)
+def test_read_yaml_rows_errors(tmp_path, contents, error):
+    filename = tmp_path / "cards.yaml"
+    filename.write_text(contents)
+
+    with pytest.raises(ValueError, match=error):
+        list(read_rows(filename, COLUMNS))
+
+
+def test_deck_card_table(tmp_path):
+    (tmp_path / "cards.csv").write_text("name,cost,rare\nAce,1,yes\nKing,3,no\n")
+    deck = Deck.from_dict(
+        {
+            "face_url": "face.jpg",
+            "back_url": "back.jpg",
+            "count": "2",
+            "card_table": "cards.csv",
+            "metadata": COLUMNS,
+            "card_name": "{name}",
+            "card_description": "Cost: {cost}",
+        },
+        "cards",
+    )
+
+    context = CompileContext(tmp_path)
+    with context.record_assets() as assets:
+        [ttsim_deck] = deck.generate(context)
+    cards = list(ttsim_deck.ContainedObjects)
+    assert [(i.Nickname, i.Description) for i in cards] == [("Ace", "Cost: 1"), ("King", "Cost: 3")]
+    assert json.loads(cards[0].LuaScriptState) == {"name": "Ace", "cost": 1, "rare": True}
+    # Recorded, so the build cache regenerates the deck when the table changes.
+    assert assets == [tmp_path / "cards.csv"]
@@ -0,0 +1,169 @@
+import json
+
+import pytest
+from click.testing import CliRunner
+
+from ttgen.cli import find_specs, main
+
+
+def _create_game(games_dir, name, spec):
+    game_dir = games_dir / name.lower()
+    (game_dir / "tokenstacks").mkdir(parents=True)
+    (game_dir / "tokenstacks" / "gold.png").write_bytes(b"")
+    spec_filename = game_dir / f"{name.lower()}.yaml"
+    spec_filename.write_text(spec)
+    return spec_filename
+
+
+GAME_SPEC = """
+name: {name}
+components:
+  table:
+    __class__: FlexTable
+  gold:
+    __class__: TokenStack
+"""
+
+
+def test_find_specs(tmp_path):
+    _create_game(tmp_path, "Alpha", GAME_SPEC.format(name="Alpha"))
+    _create_game(tmp_path, "Bravo", GAME_SPEC.format(name="Bravo"))
+    (tmp_path / "README.yaml").write_text("")
+
+    assert find_specs(tmp_path) == [
+        str(tmp_path / "alpha" / "alpha.yaml"),
+        str(tmp_path / "bravo" / "bravo.yaml"),
+    ]
+
+
+def test_compile_all(tmp_path):
+    games_dir = tmp_path / "games"
+    output_dir = tmp_path / "output"
+    output_dir.mkdir()
+    _create_game(games_dir, "Alpha", GAME_SPEC.format(name="Alpha"))
+    _create_game(games_dir, "Broken", "name: Broken\ncomponents:\n  table:\n    __class__: Invalid\n")
+    _create_game(games_dir, "Charlie", GAME_SPEC.format(name="Charlie"))
+
+    result = CliRunner().invoke(
+        main, ["compile-all", str(games_dir), "--output-dir", str(output_dir), "--jobs", "2"]
+    )
+
+    # The broken spec fails the command but not the other specs.
+    assert result.exit_code == 1
+    assert "Invalid component class: Invalid." in result.output
+    assert sorted(i.name for i in output_dir.iterdir()) == ["Alpha.json", "Charlie.json"]
+    assert result.output.count(" ok ") == 2
+    assert result.output.count(" FAILED ") == 1
+
+
+LAYOUT_SPEC = """
+name: {name}
+components:
+  table:
+    __class__: FlexTable
+  cards:
+    __class__: Deck
+    count: 10
+layout:
+  - __class__: OpenDeck
+    deck: cards
+    count: 2
+"""
+
+
+def test_compile_all_isolates_specs(tmp_path):
+    games_dir = tmp_path / "games"
+    output_dir = tmp_path / "output"
+    output_dir.mkdir()
+    for i_name in ("Alpha", "Bravo"):
+        spec_filename = _create_game(games_dir, i_name, LAYOUT_SPEC.format(name=i_name))
+        (spec_filename.parent / "decks").mkdir()
+        (spec_filename.parent / "decks" / "cards.jpg").write_bytes(b"")
+        (spec_filename.parent / "decks" / "cards_back.jpg").write_bytes(b"")
+
+    # A single worker compiles both specs, one after the other.
+    result = CliRunner().invoke(
+        main, ["compile-all", str(games_dir), "--output-dir", str(output_dir), "--jobs", "1"]
+    )
+    assert result.exit_code == 0, result.output
+
+    for i_name in ("Alpha", "Bravo"):
+        save = json.loads((output_dir / f"{i_name}.json").read_text())
+        snap_points = [j for i in save["ObjectStates"] for j in i["AttachedSnapPoints"]]
+        deck = next(i for i in save["ObjectStates"] if i["Name"] == "DeckCustom")
+        assert len(snap_points) == 3
+        assert list(deck["CustomDeck"]) == ["1"]
+
+
+def test_lazy_imports():
+    import subprocess
+    import sys
+
+    # Importing the CLI doesn't import what only the commands need.
+    code = "import sys, ttgen.cli; print(sorted({'yaml', 'dataclasses_json'} & set(sys.modules)))"
+    output = subprocess.check_output([sys.executable, "-c", code], universal_newlines=True)
+    assert output.strip() == "[]"
+
+
+def test_timings(tmp_path):
+    spec_filename = _create_game(tmp_path, "Alpha", GAME_SPEC.format(name="Alpha"))
+
+    result = CliRunner().invoke(
+        main, ["--timings", "compile", str(spec_filename), "--output-dir", str(tmp_path)]
+    )
+    assert result.exit_code == 0, result.output
+    timings = result.output.split("Timings:\n")[1].splitlines()
+    assert [i.split()[1] for i in timings] == ["import", "load", "parse", "layout", "generate", "save"]
+
+
+def test_profile(tmp_path):
+    import pstats
+
+    spec_filename = _create_game(tmp_path, "Alpha", GAME_SPEC.format(name="Alpha"))
+    for i_profile in ("profile.json", "profile.prof"):
+        result = CliRunner().invoke(
+            main,
+            [
+                "compile", str(spec_filename), "--output-dir", str(tmp_path),
+                "--profile", str(tmp_path / i_profile),
+            ],
+        )
+        assert result.exit_code == 0, result.output
+
+    report = json.loads((tmp_path / "profile.json").read_text())
+    assert report["game"] == "Alpha"
+    assert [i["name"] for i in report["phases"]] == ["import", "load", "parse", "layout", "generate", "save"]
+    assert sorted(i["key"] for i in report["components"]) == ["table", "tokenstack:gold"]
+    assert [i["count"] for i in report["component_classes"]] == [1, 1]
+    assert pstats.Stats(str(tmp_path / "profile.prof")).total_calls > 0
+
+
+def test_profiler_peaks():
+    import sys
+    import tracemalloc
+
+    from ttgen.profiling import Profiler
+
+    profiler = Profiler()
+    profiler.start()
+    try:
+        with profiler.phase("generate"):
+            data = [bytes(1000) for _ in range(1000)]
+            with profiler.phase("inner"):
+                pass
+            del data
+        # Phases that raise are recorded too.
+        with pytest.raises(ValueError):
+            with profiler.phase("save"):
+                raise ValueError()
+    finally:
+        profiler.stop()
+
+    assert list(profiler.phases) == ["inner", "generate", "save"]
+    if hasattr(tracemalloc, "reset_peak"):
+        # The peak of a phase that frees its memory, not the net change.
+        assert profiler.peaks["generate"] > 1000000
+        assert profiler.peaks["inner"] < 100000
+    else:
+        assert sys.version_info < (3, 9)
+        assert profiler.peaks["generate"] is None
@@ -0,0 +1,107 @@
+import pytest
+
+from ttgen.dataclass_ import Point3D
+from ttgen.tabletop_generator.components import Board, Deck, FlexTable, Schemas, TokenStack
+
+
+def test_schemas_cache():
+    a = Deck.from_dict({"count": "10"}, "alpha")
+    b = Deck.from_dict({"num_dim": "8x6"}, "bravo")
+
+    assert (a.name, a.count, a.num_dim) == ("alpha", 10, "10x7")
+    assert (b.name, b.count, b.num_dim) == ("bravo", 52, "8x6")
+    assert Schemas.get_schema(Deck) is Schemas.get_schema(Deck)
+
+
+def test_schemas_timings():
+    Schemas.start_timings()
+    try:
+        Deck.from_dict({}, "alpha")
+        Deck.from_dict({}, "bravo")
+        [(name, count, _build, _load)] = Schemas.report_timings()
+    finally:
+        Schemas.TIMINGS = None
+
+    assert (name, count) == ("Deck", 2)
+
+
+def test_generate_instances(tmp_path):
+    from ttgen.tabletop_generator.context import CompileContext
+
+    tokens = TokenStack.from_dict(
+        {"image_url": "token.png", "repeat": "3", "spacing": {"x": "2.0", "y": "1.0"}},
+        "coins",
+    )
+    objects = tokens.generate_instances(CompileContext(tmp_path))
+    assert [(i.Transform.posX, i.Transform.posZ) for i in objects] == [
+        (0.0, 0.0), (2.0, 1.0), (4.0, 2.0),
+    ]
+    assert len({i.GUID for i in objects}) == 3
+    # The copies share everything but their transform and GUID.
+    assert all(i.CustomImage is objects[0].CustomImage for i in objects)
+    # Which the JSON writer renders once, unlike the transforms.
+    assert objects[0].CustomImage._shared
+    assert not any(i.Transform._shared for i in objects)
+
+    deck = Deck.from_dict(
+        {"face_url": "face.jpg", "back_url": "back.jpg", "count": "2",
+         "instances": [{"x": "-5.0"}, {"x": "5.0"}]},
+        "cards",
+    )
+    objects = deck.generate_instances(CompileContext(tmp_path))
+    assert [i.Transform.posX for i in objects] == [-5.0, 5.0]
+    guids = [j.GUID for i in objects for j in [i] + list(i.ContainedObjects)]
+    assert len(set(guids)) == 6
+
+
+def test_board_annotate(tmp_path):
+    from ttgen.tabletop_generator.annotations import Line, SnapPoint
+    from ttgen.tabletop_generator.context import CompileContext
+
+    board = Board.from_dict(
+        {
+            "image_url": "board.jpg",
+            "image_size": "2000x1000",
+            "position": {"x": "10.0", "y": "5.0"},
+            "snap_points": {"corner": "0, 0", "center": "1000, 500"},
+            "lines": {"edge": "0, 1000, 2000, 1000, 2000, 0"},
+        },
+        "map",
+    )
+    context = CompileContext(tmp_path)
+    board.annotate(context)
+    snap_points = [i.position for i in context.annotations if isinstance(i, SnapPoint)]
+    [line] = [i.points for i in context.annotations if isinstance(i, Line)]
+    # The image is fitted in the 10x10 board: 10x5 with its top on +y.
+    assert snap_points == [(5.0, 7.5), (10.0, 5.0)]
+    assert line == ((5.0, 2.5), (15.0, 2.5), (15.0, 7.5))
+
+    # Lines are drawn open, unlike boxes.
+    lines = [j for i in FlexTable(name="table").generate(context) for j in i.AttachedVectorLines]
+    assert [i.loop for i in lines] == [False]
+
+    # Turned a quarter clockwise, the image top faces +x.
+    board.rotation.y = 90.0
+    context = CompileContext(tmp_path)
+    board.annotate(context)
+    snap_points = [i.position for i in context.annotations if isinstance(i, SnapPoint)]
+    assert snap_points == [(12.5, 10.0), (10.0, 5.0)]
+
+    # Scaled boards scale their points, and copies get their own.
+    board.rotation.y = 0.0
+    board.scale = Point3D(2.0, 1.0, 0.5)
+    board.repeat = 2
+    board.spacing = Point3D(0.0, 20.0, 0.0)
+    context = CompileContext(tmp_path)
+    board.annotate(context)
+    snap_points = [i.position for i in context.annotations if isinstance(i, SnapPoint)]
+    assert snap_points == [(0.0, 6.25), (10.0, 5.0), (0.0, 26.25), (10.0, 25.0)]
+    assert sum(isinstance(i, Line) for i in context.annotations) == 2
+
+    board.snap_points = {"corner": "0, 0, 1"}
+    with pytest.raises(ValueError, match="invalid points"):
+        board.annotate(context)
+    board.image_size = ""
+    board.snap_points = {"corner": "0, 0"}
+    with pytest.raises(ValueError, match="image_size is required"):
+        board.annotate(context)
@@ -0,0 +1,52 @@
+import contextlib
+import io
+import json
+from concurrent.futures import ThreadPoolExecutor
+
+from ttgen.cli import TabletopGenerator
+
+
+SPEC = """
+name: {name}
+components:
+  table:
+    __class__: FlexTable
+  first:
+    __class__: Deck
+    count: {count}
+  second:
+    __class__: Deck
+    count: 2
+layout:
+  - __class__: OpenDeck
+    deck: first
+    count: 2
+"""
+
+
+def _create_game(tmp_path, name, count):
+    game_dir = tmp_path / name.lower()
+    (game_dir / "decks").mkdir(parents=True)
+    for i_name in ("first", "first_back", "second", "second_back"):
+        (game_dir / "decks" / f"{i_name}.jpg").write_bytes(b"")
+    spec_filename = game_dir / f"{name.lower()}.yaml"
+    spec_filename.write_text(SPEC.format(name=name, count=count))
+    with contextlib.redirect_stdout(io.StringIO()):
+        return TabletopGenerator(spec_filename)
+
+
+def test_concurrent_compiles(tmp_path):
+    generators = [_create_game(tmp_path, f"Game{i}", 3 + i) for i in range(8)]
+
+    # Every compile numbers its decks and draws its annotations on its own,
+    # whatever runs next to it.
+    with contextlib.redirect_stdout(io.StringIO()), ThreadPoolExecutor(4) as executor:
+        list(executor.map(lambda x: x.compile(tmp_path, use_cache=False), generators * 2))
+
+    for i in range(8):
+        save = json.loads((tmp_path / f"Game{i}.json").read_text())
+        decks = [j for j in save["ObjectStates"] if j["Name"] == "DeckCustom"]
+        assert [list(j["CustomDeck"]) for j in decks] == [["1"], ["2"]]
+        assert decks[0]["DeckIDs"] == list(range(100, 103 + i))
+        snap_points = [k for j in save["ObjectStates"] for k in j["AttachedSnapPoints"]]
+        assert len(snap_points) == 3
@@ -1,7 +1,7 @@
 from dataclasses import dataclass, field
 from typing import Dict, List
 
-from ttgen.dataclass_ import dataclass_from_dict
+from ttgen.dataclass_ import dataclass_from_dict, get_converter
 
 
 def test_simple_value():
@@ -75,3 +75,21 @@ def test_dataclass_list():
     a = dataclass_from_dict(Alpha, objects=[MyObject(value=5)])
     assert a.objects == [MyObject(value=5)]
 
+
+
+def test_converter_cache():
+
+    @dataclass
+    class MyObject:
+        value: int = 5
+
+    @dataclass
+    class Alpha:
+        objects: List[MyObject] = field(default_factory=list)
+
+    assert get_converter(Alpha) is get_converter(Alpha)
+
+    a = dataclass_from_dict(Alpha, objects=[dict(value=1)])
+    b = dataclass_from_dict(Alpha, objects=[dict(value=2)])
+    assert a.objects == [MyObject(value=1)]
+    assert b.objects == [MyObject(value=2)]
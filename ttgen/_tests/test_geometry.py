@@ -0,0 +1,19 @@
+import pytest
+
+from ttgen.geometry import Affine, Point, Polygon, Rect
+
+
+def test_point_precision():
+    assert Point.create(0.1 + 0.2, 6.300000000000001) == Point(0.3, 6.3)
+
+
+def test_rect():
+    r = Rect.centered(0.0, 0.0, 4.0, 2.0)
+    assert r == Rect(-2.0, -1.0, 4.0, 2.0)
+    assert r.to_polygon() == Polygon((-2.0, -1.0), (2.0, -1.0), (2.0, 1.0), (-2.0, 1.0))
+
+
+def test_affine():
+    t = Affine.create(scale=(2.0, 2.0), rotation=90.0, translation=(10.0, 0.0), origin=(1.0, 1.0))
+    points = t.apply([(1.0, 1.0), (2.0, 1.0), (1.0, 2.0)])
+    assert [j for i in points for j in i] == pytest.approx([10.0, 0.0, 10.0, -2.0, 12.0, 0.0])
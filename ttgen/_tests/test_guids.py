@@ -0,0 +1,60 @@
+import contextlib
+import io
+
+from ttgen.cli import TabletopGenerator
+from ttgen.tabletop_generator.guids import GuidAllocator
+
+
+def _allocate(guid_allocator, key, count):
+    with guid_allocator.scope(key):
+        return [guid_allocator.allocate() for _ in range(count)]
+
+
+def test_guid_allocator():
+    guid_allocator = GuidAllocator()
+    guids = _allocate(guid_allocator, "deck:cards", 20000)
+    assert len(set(guids)) == 20000
+    assert all(len(i) == 6 for i in guids)
+
+    # Deterministic GUIDs only depend on the seed and the component key.
+    a = GuidAllocator("Alpha")
+    b = GuidAllocator("Alpha")
+    _allocate(b, "board:map", 10)
+    assert _allocate(a, "deck:cards", 10) == _allocate(b, "deck:cards", 10)
+    assert _allocate(GuidAllocator("Bravo"), "deck:cards", 10) != _allocate(a, "deck:other", 10)
+
+    # Reserved GUIDs are never allocated.
+    guids = _allocate(GuidAllocator("Alpha"), "deck:cards", 2)
+    c = GuidAllocator("Alpha")
+    assert c.reserve(guids[1:])
+    assert not c.reserve(guids)
+    assert _allocate(c, "deck:cards", 2)[0] == guids[0]
+    assert guids[1] not in _allocate(c, "deck:cards", 2)
+
+
+SPEC = """
+name: Alpha
+components:
+  table:
+    __class__: FlexTable
+  cards:
+    __class__: Deck
+    count: 3
+"""
+
+
+def test_deterministic_guids(tmp_path):
+    for i_path in ("decks/cards.jpg", "decks/cards_back.jpg"):
+        (tmp_path / i_path).parent.mkdir(exist_ok=True)
+        (tmp_path / i_path).write_bytes(b"")
+    spec_filename = tmp_path / "alpha.yaml"
+    spec_filename.write_text(SPEC)
+
+    contents = []
+    for i_use_cache in (True, True, False):
+        with contextlib.redirect_stdout(io.StringIO()):
+            TabletopGenerator(spec_filename).compile(
+                tmp_path, use_cache=i_use_cache, guids="deterministic"
+            )
+        contents.append((tmp_path / "Alpha.json").read_text())
+    assert contents[0] == contents[1] == contents[2]
@@ -0,0 +1,47 @@
+import pytest
+
+from ttgen.tabletop_generator.images import ImageOptimizer
+
+
+def test_image_optimizer(tmp_path):
+    Image = pytest.importorskip("PIL.Image")
+
+    large = tmp_path / "large.png"
+    Image.new("RGB", (300, 150), (255, 0, 0)).save(large)
+    small = tmp_path / "small.jpg"
+    Image.new("RGB", (20, 20), (0, 0, 255)).save(small, quality=95)
+
+    optimizer = ImageOptimizer(tmp_path / "images", max_texture=100)
+    optimizer.add(large)
+    optimizer.add(small, max_texture=10)
+    optimizer.run(jobs=1)
+
+    with Image.open(optimizer.get(large)) as image:
+        assert image.size == (100, 50)
+    with Image.open(optimizer.get(small, max_texture=10)) as image:
+        assert image.size == (10, 10)
+    assert optimizer.get(small) is None
+    assert optimizer.get(tmp_path / "other.png") is None
+
+    count, source_bytes, optimized_bytes = optimizer.report()
+    assert count == 2
+    assert optimized_bytes < source_bytes
+
+    # An image used with different sizes is optimized for each.
+    optimizer.add(large, max_texture=20)
+    optimizer.run(jobs=1)
+    with Image.open(optimizer.get(large, max_texture=20)) as image:
+        assert image.size == (20, 10)
+    with Image.open(optimizer.get(large)) as image:
+        assert image.size == (100, 50)
+    count, source_bytes, _ = optimizer.report()
+    assert count == 3
+    assert source_bytes == large.stat().st_size + small.stat().st_size
+    assert [i.name for i in (tmp_path / "images").iterdir() if i.suffix == ".tmp"] == []
+
+    # Already optimized images are reused as is.
+    mtime = optimizer.get(large).stat().st_mtime_ns
+    optimizer = ImageOptimizer(tmp_path / "images", max_texture=100)
+    optimizer.add(large)
+    optimizer.run(jobs=1)
+    assert optimizer.get(large).stat().st_mtime_ns == mtime
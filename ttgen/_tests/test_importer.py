@@ -0,0 +1,61 @@
+import io
+from pathlib import Path
+
+import yaml
+
+from ttgen.cli import TabletopGenerator
+from ttgen.tabletop_generator.importer import import_save
+from ttgen.tabletop_simulator import (
+    TabletopCard,
+    TabletopCustomTile,
+    TabletopDeckCustom,
+    TabletopObjectState,
+    TabletopSimulator,
+)
+from ttgen.tabletop_simulator.json_reader import load
+from ttgen.tabletop_simulator.json_writer import dump
+
+
+EXAMPLES_DIR = Path(__file__).parents[2] / "examples"
+
+
+def test_load():
+    ttsim = TabletopSimulator()
+    ttsim.ObjectStates.append(
+        TabletopDeckCustom.from_dict(
+            Nickname="Deck",
+            CustomDeck={"1": dict(FaceURL="face.jpg")},
+            ContainedObjects=[TabletopCard(CardID=100 + i) for i in range(3)],
+        )
+    )
+    oss = io.StringIO()
+    dump(ttsim, oss)
+
+    assert load(io.StringIO(oss.getvalue())) == ttsim
+
+
+def test_load_save():
+    ttsim = TabletopSimulator.load(EXAMPLES_DIR / "TS_Save_16.json")
+
+    assert len(ttsim.ObjectStates) == 239
+    deck = ttsim.ObjectStates[0]
+    assert isinstance(deck, TabletopDeckCustom)
+    assert deck.CustomDeck["28"].NumWidth == 10
+    assert all(isinstance(i, TabletopCard) for i in deck.ContainedObjects)
+    assert isinstance(ttsim.ObjectStates[3], TabletopCustomTile)
+    # Objects without a matching class keep the common fields.
+    [bag] = [i for i in ttsim.ObjectStates if i.Name == "Custom_Model_Bag"]
+    assert type(bag) is TabletopObjectState
+
+
+def test_import_save(tmp_path):
+    spec = import_save(TabletopSimulator.load(EXAMPLES_DIR / "TTGen_Board.json"))
+    spec["components"]["board"]["border"] = False
+    spec_filename = tmp_path / "game.yaml"
+    spec_filename.write_text(yaml.safe_dump(spec, sort_keys=False))
+
+    # The spec compiles back into the same objects.
+    ttg = TabletopGenerator(spec_filename)
+    ttg.compile(tmp_path)
+    compiled = TabletopSimulator.load(tmp_path / f"{spec['name']}.json")
+    assert import_save(compiled) == spec
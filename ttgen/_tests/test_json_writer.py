@@ -0,0 +1,135 @@
+import io
+import json
+import os
+import stat
+from dataclasses import asdict
+
+import pytest
+
+from ttgen.tabletop_simulator import (
+    TabletopCard,
+    TabletopCardList,
+    TabletopDeckCustom,
+    TabletopSimulator,
+)
+from ttgen.tabletop_simulator.json_writer import dump
+
+
+def test_dump():
+    ttsim = TabletopSimulator()
+    ttsim.ObjectStates.append(
+        TabletopDeckCustom.from_dict(
+            Nickname="Deck é",
+            CustomDeck={"1": dict(FaceURL="face.jpg")},
+            ContainedObjects=[TabletopCard(CardID=100 + i) for i in range(3)],
+        )
+    )
+
+    oss = io.StringIO()
+    dump(ttsim, oss)
+    assert oss.getvalue() == json.dumps(asdict(ttsim), indent=2)
+
+
+def test_dump_values():
+    value = {"a": [], "b": {}, "c": [1, 2.5, None, True, "x"], "d": (float("nan"),)}
+
+    oss = io.StringIO()
+    dump(value, oss, indent=4)
+    assert oss.getvalue() == json.dumps(value, indent=4)
+
+
+def test_dump_compact():
+    card = TabletopCard(CardID=100, GUID="abcdef")
+
+    oss = io.StringIO()
+    dump(card, oss, indent=None)
+    assert oss.getvalue() == json.dumps(asdict(card), separators=(",", ":"))
+
+    oss = io.StringIO()
+    dump(card, oss, indent=None, skip_defaults=True)
+    contents = json.loads(oss.getvalue())
+    assert contents["GUID"] == "abcdef"
+    assert contents["Grid"] is True
+    assert contents["Transform"]["scaleX"] == 1.0
+    assert "Nickname" not in contents
+    assert "AttachedSnapPoints" not in contents
+
+
+def test_dump_shared():
+    # Substructures shared by several objects, at different levels.
+    deck = TabletopDeckCustom.from_dict(CustomDeck={"1": dict(FaceURL="face.jpg")}).share()
+    shared = deck.CustomDeck["1"].share()
+    value = {"decks": [deck, deck, {"nested": [shared]}], "deck": deck}
+
+    oss = io.StringIO()
+    dump(value, oss)
+    expected = {
+        "decks": [asdict(deck), asdict(deck), {"nested": [asdict(shared)]}],
+        "deck": asdict(deck),
+    }
+    assert oss.getvalue() == json.dumps(expected, indent=2)
+
+
+def test_dump_card_list():
+    cards = TabletopCardList(
+        [
+            (100, "abcdef", "", "", ""),
+            (101, "123456", "Ace é", "", '{"cost": 1}'),
+            (102, "", "", "x", ""),
+        ]
+    )
+    deck = TabletopDeckCustom.from_dict(DeckIDs=[100, 101, 102])
+    deck.ContainedObjects = cards
+    expanded = TabletopDeckCustom.from_dict(DeckIDs=[100, 101, 102])
+    expanded.ContainedObjects = cards.expand()
+
+    # Written as the cards it stands for, whatever the options.
+    for i_options in (dict(), dict(indent=None), dict(indent=None, skip_defaults=True)):
+        oss = io.StringIO()
+        dump(deck, oss, **i_options)
+        expected = io.StringIO()
+        dump(expanded, expected, **i_options)
+        assert oss.getvalue() == expected.getvalue()
+    assert json.loads(oss.getvalue())["ContainedObjects"][1]["Nickname"] == "Ace é"
+
+
+def test_dump_card_lists(tmp_path):
+    # Many decks written to a file, whose buffering reallocates the memory of
+    # the card templates of a deck while the next ones are written.
+    decks = []
+    expanded = []
+    for i in range(150):
+        cards = TabletopCardList(
+            (100 * i + j, f"{i:03}{j:03}", "x" * (j % 2), "", "") for j in range(6)
+        )
+        decks.append(TabletopDeckCustom.from_dict(Nickname=str(i)))
+        decks[-1].ContainedObjects = cards
+        expanded.append(TabletopDeckCustom.from_dict(Nickname=str(i)))
+        expanded[-1].ContainedObjects = cards.expand()
+
+    filename = tmp_path / "decks.json"
+    for i_options in (dict(), dict(indent=None), dict(indent=None, skip_defaults=True)):
+        with filename.open("w") as oss:
+            dump(decks, oss, **i_options)
+        expected = io.StringIO()
+        dump(expanded, expected, **i_options)
+        assert filename.read_text() == expected.getvalue()
+
+
+@pytest.mark.skipif(os.name == "nt", reason="POSIX file modes")
+def test_save_mode(tmp_path):
+    umask = os.umask(0o022)
+    try:
+        filename = tmp_path / "Alpha.json"
+        TabletopSimulator().save(filename)
+        assert stat.S_IMODE(filename.stat().st_mode) == 0o644
+
+        # An existing save keeps its mode.
+        filename.chmod(0o640)
+        ttsim = TabletopSimulator()
+        ttsim.SaveName = "Changed"
+        assert ttsim.save(filename)
+        assert stat.S_IMODE(filename.stat().st_mode) == 0o640
+    finally:
+        os.umask(umask)
+    assert not list(tmp_path.glob("*.tmp"))
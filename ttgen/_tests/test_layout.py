@@ -0,0 +1,92 @@
+from unittest import mock
+
+import pytest
+
+from ttgen.tabletop_generator.annotations import Box, SnapPoint
+from ttgen.tabletop_generator.components import Board, Deck, FlexTable
+from ttgen.tabletop_generator.layout import Layout, OpenDeck
+
+
+def _create_layout(depth):
+    components = {
+        "deck:cards": Deck(name="cards"),
+        "board:map": Board(name="map"),
+    }
+    d = {"__class__": "OpenDeck", "deck": "cards", "count": 2}
+    for i in range(depth):
+        d = {
+            "__class__": "VerticalBox" if i % 2 else "HorizontalBox",
+            "items": [d, {"__class__": "LayoutItem", "ref": "board:map"}],
+        }
+    return Layout.create_layout(d, components), components
+
+
+def test_measure_once():
+    layout, _components = _create_layout(16)
+
+    # The deepest node is measured once, not once per parent.
+    with mock.patch.object(OpenDeck, "_measure", autospec=True, return_value=(7.4, 3.2)) as m:
+        layout.apply(0.0, 0.0)
+        layout.apply(0.0, 0.0)
+    assert m.call_count == 1
+
+
+def test_invalidate():
+    layout, components = _create_layout(3)
+    open_deck = layout.items[0].items[0].items[0]
+    assert layout.measure() == pytest.approx((27.4, 20.0))
+
+    # Changing a node field drops the sizes of its parents.
+    open_deck.count = 4
+    assert layout.measure() == pytest.approx((32.6, 20.0))
+
+    # Changing a referenced component drops the sizes of the nodes using it.
+    board = components["board:map"]
+    with mock.patch.object(Board, "width", 20.0), mock.patch.object(Board, "height", 20.0):
+        assert layout.measure() == pytest.approx((32.6, 20.0))
+        layout.invalidate_component(board)
+        assert layout.measure() == pytest.approx((52.6, 40.0))
+
+
+def _create_boards(count, table_width=18.0):
+    result = {"table": FlexTable(name="table", table_width=table_width)}
+    for i in range(count):
+        result[f"board:b{i}"] = Board(name=f"b{i}")
+    return result
+
+
+def test_grid():
+    components = _create_boards(5)
+    refs = [f"board:b{i}" for i in range(5)]
+    grid = Layout.create_layout(
+        {"__class__": "Grid", "columns": 3, "rows": 2, "refs": refs, "boxes": True},
+        components,
+    )
+    grid.apply(0.0, 0.0)
+
+    assert grid.measure() == pytest.approx((30.8, 20.4))
+    positions = [j for i in refs for j in (components[i].position.x, components[i].position.y)]
+    assert positions == pytest.approx([-10.4, -5.2, 0.0, -5.2, 10.4, -5.2, -10.4, 5.2, 0.0, 5.2])
+    # The empty cell gets its snap point and box too.
+    annotations = list(grid.annotations)
+    assert sum(isinstance(i, SnapPoint) for i in annotations) == 6
+    assert sum(isinstance(i, Box) for i in annotations) == 6
+
+    with pytest.raises(ValueError, match="Too many cells"):
+        Layout.create_layout(
+            {"__class__": "Grid", "columns": 2, "rows": 2, "refs": refs}, components
+        )
+
+
+def test_flow():
+    # Wraps at the table width: two 10 wide boards per row.
+    components = _create_boards(5, table_width=25.0)
+    refs = [f"board:b{i}" for i in range(5)]
+    flow = Layout.create_layout({"__class__": "Flow", "refs": refs}, components)
+    flow.apply(0.0, 0.0)
+
+    assert flow.max_width == 25.0
+    assert flow.measure() == pytest.approx((20.4, 30.8))
+    positions = [j for i in refs for j in (components[i].position.x, components[i].position.y)]
+    assert positions == pytest.approx([-5.2, -10.4, 5.2, -10.4, -5.2, 0.0, 5.2, 0.0, -5.2, 10.4])
+    assert len(list(flow.annotations)) == 5
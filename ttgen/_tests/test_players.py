@@ -0,0 +1,106 @@
+import contextlib
+import io
+import json
+
+import pytest
+
+from ttgen.cli import TabletopGenerator
+from ttgen.tabletop_generator.players import PLAYER_COLORS, Players
+
+
+SPEC = """
+name: Seats
+players:
+  __class__: Players
+  count: 4
+  components: [board:player_board]
+components:
+  table:
+    __class__: FlexTable
+    table_width: 24
+  player_board:
+    __class__: Board
+    position: {x: 0, y: 8}
+"""
+
+
+def test_seats():
+    players = Players(count=4)
+    players._table_size = (24.0, 18.0)
+
+    seats = players.get_seats()
+    assert [i[0] for i in seats] == ["White", "Brown", "Red", "Orange"]
+    assert [i[1:4] for i in seats] == [
+        (0.0, -15.0, 0.0),
+        (21.0, 0.0, 270.0),
+        (0.0, 15.0, 180.0),
+        (-21.0, 0.0, 90.0),
+    ]
+
+    # The longer edges get the extra seats.
+    players.count = 6
+    edges = [i[3] for i in players.get_seats()]
+    assert edges == [0.0, 0.0, 270.0, 180.0, 180.0, 90.0]
+
+    assert len(PLAYER_COLORS) == 12
+    with pytest.raises(ValueError, match="Invalid players count"):
+        Players(count=13).get_seats()
+    with pytest.raises(ValueError, match="Expected 3 player colors"):
+        Players(count=3, colors=["Red", "Blue"]).get_seats()
+
+
+@pytest.mark.parametrize("count", range(8, 13))
+@pytest.mark.parametrize("table_size", [(18.0, 18.0), (24.0, 18.0)])
+def test_seats_overlap(count, table_size):
+    players = Players(count=count)
+    players._table_size = table_size
+
+    rects = []
+    for _color, x, y, rotation, width in players.get_seats():
+        w, h = width, players.hand_depth
+        if rotation in (90.0, 270.0):
+            w, h = h, w
+        rects.append((x - w / 2.0, y - h / 2.0, x + w / 2.0, y + h / 2.0))
+    for i, a in enumerate(rects):
+        for b in rects[i + 1:]:
+            overlap_x = min(a[2], b[2]) - max(a[0], b[0])
+            overlap_y = min(a[3], b[3]) - max(a[1], b[1])
+            assert overlap_x <= 1e-9 or overlap_y <= 1e-9, (a, b)
+
+
+def test_per_player_components(tmp_path):
+    (tmp_path / "boards").mkdir()
+    (tmp_path / "boards" / "player_board.jpg").write_bytes(b"")
+    spec_filename = tmp_path / "seats.yaml"
+    spec_filename.write_text(SPEC)
+
+    with contextlib.redirect_stdout(io.StringIO()):
+        ttg = TabletopGenerator(spec_filename)
+        ttg.compile(tmp_path, use_cache=False)
+
+    assert list(ttg.components) == [
+        "table",
+        "board:player_board_white",
+        "board:player_board_brown",
+        "board:player_board_red",
+        "board:player_board_orange",
+    ]
+    save = json.loads((tmp_path / "Seats.json").read_text())
+    hands = save["Hands"]["HandTransforms"]
+    assert [i["Color"] for i in hands] == ["White", "Brown", "Red", "Orange"]
+
+    # Each copy is placed in front of its seat, facing the player, and uses
+    # the template image.
+    boards = [i for i in save["ObjectStates"] if i["Name"] == "Custom_Board"]
+    transforms = [
+        (round(i["Transform"]["posX"], 6) + 0.0, round(i["Transform"]["posZ"], 6) + 0.0,
+         i["Transform"]["rotY"])
+        for i in boards
+    ]
+    assert transforms == [
+        (0.0, -7.0, 180.0),
+        (13.0, 0.0, 90.0),
+        (0.0, 7.0, 0.0),
+        (-13.0, 0.0, 270.0),
+    ]
+    assert all(i["CustomImage"]["ImageURL"].endswith("player_board.jpg") for i in boards)
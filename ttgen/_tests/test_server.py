@@ -0,0 +1,131 @@
+import json
+import threading
+import urllib.error
+import urllib.request
+
+import pytest
+
+from ttgen.server import CompileServer
+
+
+SPEC = """
+name: Alpha
+components:
+  table:
+    __class__: FlexTable
+  cards:
+    __class__: Deck
+    count: 3
+"""
+
+
+@pytest.fixture
+def server():
+    result = CompileServer(("127.0.0.1", 0), jobs=1, concurrency=1)
+    thread = threading.Thread(target=result.serve_forever, daemon=True)
+    thread.start()
+    yield result
+    result.shutdown()
+    result.server_close()
+
+
+def _request(server, path, body=None):
+    url = f"http://127.0.0.1:{server.server_port}{path}"
+    data = None if body is None else json.dumps(body).encode("UTF-8")
+    try:
+        with urllib.request.urlopen(urllib.request.Request(url, data=data)) as response:
+            return response.status, json.loads(response.read())
+    except urllib.error.HTTPError as e:
+        return e.code, json.loads(e.read())
+
+
+def test_server(server, tmp_path):
+    (tmp_path / "decks").mkdir()
+    (tmp_path / "decks" / "cards.jpg").write_bytes(b"")
+    (tmp_path / "decks" / "cards_back.jpg").write_bytes(b"")
+
+    status, save = _request(server, "/compile", {"spec": SPEC, "asset_dir": str(tmp_path)})
+    assert status == 200
+    assert save["SaveName"] == "Alpha"
+    [deck] = [i for i in save["ObjectStates"] if i["Name"] == "DeckCustom"]
+    assert deck["DeckIDs"] == [100, 101, 102]
+    # The build cache is not written into the asset directory.
+    assert not (tmp_path / ".ttgen-cache").exists()
+
+    status, result = _request(
+        server, "/compile", {"spec": SPEC.replace("cards", "other"), "asset_dir": str(tmp_path)}
+    )
+    assert status == 422
+    assert result["error"].startswith("MissingAssetsError: Image files not found (2)")
+
+    assert _request(server, "/compile", {"spec": SPEC})[0] == 400
+
+    # Compiles beyond the concurrency limit are rejected.
+    server.slots.acquire()
+    status, _ = _request(server, "/compile", {"spec": SPEC, "asset_dir": str(tmp_path)})
+    server.slots.release()
+    assert status == 503
+
+    status, metrics = _request(server, "/metrics")
+    assert status == 200
+    assert metrics["requests"] == 3
+    assert (metrics["errors"], metrics["rejected"], metrics["in_flight"]) == (1, 1, 0)
+    assert metrics["latency_ms"]["count"] == 2
+
+
+def test_server_timeout(server, tmp_path):
+    (tmp_path / "decks").mkdir()
+    (tmp_path / "decks" / "cards.jpg").write_bytes(b"")
+    (tmp_path / "decks" / "cards_back.jpg").write_bytes(b"")
+    spec = SPEC.replace("count: 3", "count: 20000")
+
+    server.timeout = 0.001
+    status, result = _request(server, "/compile", {"spec": spec, "asset_dir": str(tmp_path)})
+    assert status == 422
+    assert result["error"].startswith("TimeoutError")
+
+    # The slot is held until the worker is done with the timed out compile.
+    status, _ = _request(server, "/compile", {"spec": spec, "asset_dir": str(tmp_path)})
+    assert status == 503
+    assert server.slots.acquire(timeout=60.0)
+    server.slots.release()
+
+
+def test_server_atlas(tmp_path):
+    Image = pytest.importorskip("PIL.Image")
+    (tmp_path / "cards").mkdir()
+    for i in range(20):
+        Image.new("RGB", (4, 6), (i, 0, 0)).save(tmp_path / "cards" / f"card_{i:03d}.png")
+    (tmp_path / "decks").mkdir()
+    (tmp_path / "decks" / "cards_back.jpg").write_bytes(b"")
+    spec = SPEC.replace("count: 3", "cards_dir: cards")
+
+    server = CompileServer(("127.0.0.1", 0), jobs=2, concurrency=4)
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    try:
+        # Concurrent compiles of the same game build the same sheets.
+        results = []
+        requests = [
+            threading.Thread(
+                target=lambda: results.append(
+                    _request(server, "/compile", {"spec": spec, "asset_dir": str(tmp_path)})
+                )
+            )
+            for _ in range(4)
+        ]
+        for i in requests:
+            i.start()
+        for i in requests:
+            i.join()
+    finally:
+        server.shutdown()
+        server.server_close()
+
+    assert [i[0] for i in results] == [200] * 4
+    assert {len(i[1]["ObjectStates"][-1]["ContainedObjects"]) for i in results} == {20}
+    assert sorted(i.name for i in (tmp_path / "atlases").iterdir()) == [
+        "cards.manifest.json",
+        "cards_1.jpg",
+    ]
+    with Image.open(tmp_path / "atlases" / "cards_1.jpg") as sheet:
+        assert sheet.size == (40, 12)
@@ -0,0 +1,85 @@
+import contextlib
+import io
+import json
+
+import pytest
+import yaml
+
+from ttgen.watcher import Watcher, WatchSession
+
+
+SPEC = """
+name: Alpha
+components:
+  table:
+    __class__: FlexTable
+  cards:
+    __class__: Deck
+    count: 10
+layout:
+  - __class__: OpenDeck
+    deck: cards
+    count: 2
+"""
+
+
+def _create_game(tmp_path):
+    (tmp_path / "decks").mkdir()
+    (tmp_path / "decks" / "cards.jpg").write_bytes(b"face")
+    (tmp_path / "decks" / "cards_back.jpg").write_bytes(b"back")
+    spec_filename = tmp_path / "alpha.yaml"
+    spec_filename.write_text(SPEC)
+    return spec_filename
+
+
+def test_watcher_poll(tmp_path):
+    spec_filename = _create_game(tmp_path)
+    watcher = Watcher([spec_filename, tmp_path / "decks", tmp_path / "boards"])
+    assert watcher.poll() == set()
+
+    (tmp_path / "decks" / "cards.jpg").write_bytes(b"changed")
+    (tmp_path / "decks" / "extra.jpg").write_bytes(b"new")
+    assert watcher.poll() == {
+        str(tmp_path / "decks" / "cards.jpg"),
+        str(tmp_path / "decks" / "extra.jpg"),
+    }
+    assert watcher.poll() == set()
+
+
+def test_watch_session(tmp_path):
+    spec_filename = _create_game(tmp_path)
+    output_dir = tmp_path / "output"
+    output_dir.mkdir()
+    session = WatchSession(spec_filename, output_dir)
+
+    def _rebuild(changes=()):
+        oss = io.StringIO()
+        with contextlib.redirect_stdout(oss):
+            session.rebuild(changes)
+        save = json.loads((output_dir / "Alpha.json").read_text())
+        snap_points = [j for i in save["ObjectStates"] for j in i["AttachedSnapPoints"]]
+        return oss.getvalue(), len(snap_points)
+
+    assert _rebuild() == ("* table\n* cards\nCompiling...\nBuild cache: 0 hits, 2 misses.\n", 3)
+
+    (tmp_path / "decks" / "cards.jpg").write_bytes(b"changed")
+    output, snap_points = _rebuild({str(tmp_path / "decks" / "cards.jpg")})
+    assert output == "Compiling...\nBuild cache: 1 hits, 1 misses.\n"
+    assert snap_points == 3
+
+    # Parsing the spec again doesn't accumulate the table annotations.
+    output, snap_points = _rebuild({str(spec_filename)})
+    assert "Build cache: 2 hits, 0 misses." in output
+    assert snap_points == 3
+
+    # A spec that fails to parse isn't replaced by the previous one on the
+    # next asset change.
+    spec = spec_filename.read_text()
+    spec_filename.write_text("name: Alpha\ncomponents: [")
+    with pytest.raises(yaml.YAMLError):
+        _rebuild({str(spec_filename)})
+    with pytest.raises(yaml.YAMLError):
+        _rebuild({str(tmp_path / "decks" / "cards.jpg")})
+    spec_filename.write_text(spec)
+    output, snap_points = _rebuild({str(tmp_path / "decks" / "cards.jpg")})
+    assert "Build cache: 2 hits, 0 misses." in output
@@ -1,38 +1,356 @@
+import os
 from pathlib import Path
-from typing import OrderedDict
+from typing import NamedTuple, OrderedDict
 
 import click
 
-from ttgen.tabletop_generator.layout import Layout
+from ttgen.timings import Timings
+
+# Modules are imported by the commands that need them, so the CLI starts fast
+# (see `import_generator`).
 
 
 @click.group("ttgen")
-def main():
-    pass
+@click.option(
+    "--timings",
+    is_flag=True,
+    help="Report the time spent per phase (import, load, parse, layout, generate, save).",
+)
+@click.pass_context
+def main(ctx, timings=False):
+    ctx.ensure_object(Timings)
+    if timings:
+        ctx.call_on_close(lambda: _report_timings(ctx.obj))
+
+
+def _report_timings(timings):
+    click.echo("Timings:")
+    for i_phase, i_seconds in timings.report():
+        click.echo(f"{i_seconds * 1000.0:10.3f}ms  {i_phase}")
+
+
+def import_generator():
+    """
+    Imports the modules needed to compile specs: yaml, dataclasses-json and
+    the ttgen components.
+
+    Commands import them up front so the import time is measured apart (and
+    happens once, before forking workers).
+    """
+    import yaml  # noqa: F401
+    from ttgen.tabletop_generator import components, layout, players  # noqa: F401
+    from ttgen.tabletop_simulator import json_writer  # noqa: F401
 
 
 @main.command("compile")
 @click.argument("filename")
 @click.option("--output-dir")
+@click.option("--load-timings", is_flag=True, help="Report the spec load time per class.")
+@click.option("--debug", is_flag=True, help="Pretty-print the generated save on stdout.")
+@click.option("--compact", is_flag=True, help="Write minified JSON.")
+@click.option("--skip-defaults", is_flag=True, help="Leave out fields holding empty defaults.")
+@click.option("--no-cache", is_flag=True, help="Regenerate every component, ignoring the build cache.")
+@click.option(
+    "--asset-extensions",
+    help="Comma separated image extensions, in priority order (eg.: .jpg,.png).",
+)
+@click.option("--optimize-images", is_flag=True, help="Downscale and recompress the images.")
+@click.option("--max-texture", type=int, help="Maximum image size, in pixels (default 4096).")
+@click.option("--jpeg-quality", type=int, help="JPEG quality of optimized images (default 85).")
+@click.option(
+    "--guids",
+    type=click.Choice(["random", "deterministic"]),
+    default="random",
+    help="Random GUIDs, or GUIDs derived from the spec and the components (same on every build).",
+)
+@click.option(
+    "--profile",
+    help="Write the time and memory per phase and component (.json), or a pstats dump (eg.: out.prof).",
+)
 @click.pass_context
-def compile(ctx, filename, output_dir=None):
+def compile(
+    ctx,
+    filename,
+    output_dir=None,
+    load_timings=False,
+    debug=False,
+    compact=False,
+    skip_defaults=False,
+    no_cache=False,
+    asset_extensions=None,
+    optimize_images=False,
+    max_texture=None,
+    jpeg_quality=None,
+    guids="random",
+    profile=None,
+):
     """
     Generate tabletop-simulator mods from tabletop-generator specs.
     """
-    ttg = TabletopGenerator(filename)
-    ttg.compile(output_dir)
+    timings = ctx.ensure_object(Timings)
+    if profile:
+        from ttgen.profiling import Profiler
+
+        # Replaces the group timings, so --timings reports the profiled run.
+        timings = ctx.find_root().obj = Profiler()
+        timings.start()
+
+    game = Path(filename).stem
+    try:
+        with timings.phase("import"):
+            import_generator()
+
+        from ttgen.tabletop_generator.components import Schemas
+
+        if load_timings:
+            Schemas.start_timings()
+
+        ttg = TabletopGenerator(filename, timings=timings)
+        game = ttg.name
+        if asset_extensions:
+            ttg.asset_extensions = [i.strip() for i in asset_extensions.split(",")]
+
+        if load_timings:
+            click.echo("Load timings (schema build, load, count, class):")
+            for i_name, i_count, i_build, i_load in Schemas.report_timings():
+                click.echo(f"{i_build * 1000.0:10.3f}ms {i_load * 1000.0:10.3f}ms {i_count:5}  {i_name}")
+
+        ttg.compile(
+            output_dir,
+            debug=debug,
+            compact=compact,
+            skip_defaults=skip_defaults,
+            use_cache=not no_cache,
+            optimize_images=optimize_images,
+            max_texture=max_texture,
+            jpeg_quality=jpeg_quality,
+            guids=guids,
+        )
+    finally:
+        if profile:
+            timings.stop()
+            timings.dump(profile, game=game)
+            click.echo(f"Profile written into {profile}.")
+
+
+@main.command("compile-all")
+@click.argument("directory", default="games")
+@click.option("--output-dir")
+@click.option("--jobs", type=int, help="Number of worker processes (defaults to one per core).")
+@click.option("--optimize-images", is_flag=True, help="Downscale and recompress the images.")
+@click.pass_context
+def compile_all(ctx, directory, output_dir=None, jobs=None, optimize_images=False):
+    """
+    Generate tabletop-simulator mods for every spec found under DIRECTORY.
+
+    Specs are compiled in parallel, one worker process per core. A failing spec
+    is reported but does not abort the others.
+    """
+    import time
+    from multiprocessing import Pool
+
+    # Warm up the imports before forking the workers.
+    import_generator()
+
+    specs = find_specs(directory)
+    if not specs:
+        raise click.ClickException(f"No specs found under {directory}.")
+
+    click.echo(f"Compiling {len(specs)} specs...")
+    start = time.perf_counter()
+    with Pool(jobs or os.cpu_count()) as pool:
+        results = pool.starmap(compile_spec, [(i, output_dir, optimize_images) for i in specs])
+
+    for i_result in results:
+        status = "ok" if i_result.error is None else "FAILED"
+        saved = ""
+        if i_result.bytes_saved is not None:
+            saved = f"  ({i_result.bytes_saved} image bytes saved)"
+        click.echo(f"{i_result.elapsed:8.3f}s  {status:6}  {i_result.filename}{saved}")
+    click.echo(f"{time.perf_counter() - start:8.3f}s  total")
+
+    failures = [i for i in results if i.error is not None]
+    for i_result in failures:
+        click.echo(f"\n{i_result.filename}:\n{i_result.error}", err=True)
+    if failures:
+        ctx.exit(1)
+
+
+@main.command("watch")
+@click.argument("filename")
+@click.option("--output-dir")
+@click.option("--debounce", type=float, default=0.3, help="Seconds to wait for changes to settle.")
+def watch(filename, output_dir=None, debounce=0.3):
+    """
+    Recompiles the spec whenever it or its decks, boards or tokenstacks
+    images change.
+    """
+    from ttgen.watcher import Watcher, WatchSession
+
+    session = WatchSession(filename, output_dir)
+
+    def _rebuild(changes=()):
+        try:
+            elapsed = session.rebuild(changes)
+        except Exception as e:
+            click.echo(f"Build failed: {e}", err=True)
+        else:
+            click.echo(f"Built in {elapsed:.3f}s.")
+
+    _rebuild()
+    watcher = Watcher(session.get_watched_paths(), debounce=debounce)
+    click.echo(f"Watching {filename}... (Ctrl+C to stop)")
+    try:
+        for i_changes in watcher.batches():
+            click.echo(f"{len(i_changes)} file(s) changed.")
+            _rebuild(i_changes)
+    except KeyboardInterrupt:
+        pass
+
+
+@main.command("import")
+@click.argument("filename")
+@click.option("--output", help="Spec file to write, defaults to stdout.")
+@click.pass_context
+def import_(ctx, filename, output=None):
+    """
+    Generate a tabletop-generator spec from a tabletop-simulator save.
+
+    Decks, boards, tiles, token stacks and models are imported, other objects
+    are left out.
+    """
+    timings = ctx.ensure_object(Timings)
+    with timings.phase("import"):
+        import yaml
+        from ttgen.tabletop_generator.importer import import_save
+        from ttgen.tabletop_simulator import TabletopSimulator
+
+    with timings.phase("parse"):
+        ttsim = TabletopSimulator.load(filename)
+    with timings.phase("generate"):
+        spec = import_save(ttsim)
+    with timings.phase("save"):
+        contents = yaml.safe_dump(spec, sort_keys=False, allow_unicode=True)
+        if output is None:
+            click.echo(contents, nl=False)
+        else:
+            Path(output).write_text(contents, encoding="utf-8")
+            click.echo(f"{len(spec['components'])} components written into {output}.")
+
+
+@main.command("serve")
+@click.option("--host", default="127.0.0.1")
+@click.option("--port", type=int, default=8080)
+@click.option("--jobs", type=int, help="Number of worker processes (defaults to one per core).")
+@click.option("--concurrency", type=int, help="Maximum concurrent compiles (defaults to --jobs).")
+@click.option("--timeout", type=float, default=60.0, help="Seconds a compile may take.")
+def serve(host, port, jobs=None, concurrency=None, timeout=60.0):
+    """
+    Serve compiles over HTTP: POST a spec to /compile, GET /metrics.
+    """
+    from ttgen.server import CompileServer
+
+    server = CompileServer((host, port), jobs=jobs, concurrency=concurrency, timeout=timeout)
+    click.echo(f"Serving on http://{host}:{server.server_port}/ (Ctrl+C to stop)")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+
+
+def find_specs(directory):
+    """
+    Lists the tabletop-generator specs under the given directory, one per game
+    sub-directory (eg.: games/*/*.yaml).
+    """
+    return sorted(str(i) for i in Path(directory).glob("*/*.yaml"))
+
+
+class CompileResult(NamedTuple):
+    filename: str
+    elapsed: float
+    error: str = None
+    bytes_saved: int = None
+
+
+def compile_spec(filename, output_dir=None, optimize_images=False):
+    """
+    Compiles a single spec, capturing its failure instead of raising.
+
+    This is the unit of work for `compile-all`: it runs on a worker process and
+    silences the generator's progress output.
+
+    :param filename: The spec file.
+    :param output_dir: Destination directory. Defaults to the spec directory.
+    :param optimize_images: Downscales and recompresses the images.
+    :return CompileResult:
+    """
+    import contextlib
+    import time
+    import traceback
+
+    start = time.perf_counter()
+    try:
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            ttg = TabletopGenerator(filename)
+            ttg.compile(output_dir or Path(filename).parent, optimize_images=optimize_images)
+    except Exception:
+        return CompileResult(filename, time.perf_counter() - start, traceback.format_exc())
+
+    bytes_saved = None
+    if ttg.image_report is not None:
+        _count, source_bytes, optimized_bytes = ttg.image_report
+        bytes_saved = source_bytes - optimized_bytes
+    return CompileResult(filename, time.perf_counter() - start, bytes_saved=bytes_saved)
 
 
 class TabletopGenerator:
 
-    def __init__(self, filename):
+    def __init__(self, filename, source=None, timings=None):
+        """
+        :param filename: The spec file, its directory is the game directory.
+        :param source: The spec contents, read from `filename` when omitted.
+        :param timings: Records the load, parse, layout, generate and save
+            phases.
+        """
+        self.timings = Timings() if timings is None else timings
+        with self.timings.phase("load"):
+            spec = self._load(filename, source)
+        with self.timings.phase("parse"):
+            layout_yaml = self._parse(spec)
+        with self.timings.phase("layout"):
+            self._create_layout(layout_yaml)
+
+    def _load(self, filename, source):
+        """
+        Reads the spec YAML.
+
+        :return: The spec dict.
+        """
         import yaml
-        from ttgen.tabletop_generator import components, players
 
         self._source_filename = Path(filename)
 
-        yaml = yaml.load(self._source_filename.open(mode="r"), Loader=yaml.BaseLoader)
+        if source is None:
+            source = self._source_filename.read_text()
+        return yaml.load(source, Loader=yaml.BaseLoader)
+
+    def _parse(self, yaml):
+        """
+        Creates the players and components.
+
+        :return: The layout dicts.
+        """
+        from ttgen.tabletop_generator import components, players
+        from ttgen.tabletop_generator.assets import DEFAULT_EXTENSIONS
+
         self.name = yaml["name"]
+        self.asset_extensions = yaml.get("asset_extensions", DEFAULT_EXTENSIONS)
+        if isinstance(self.asset_extensions, str):
+            # A single extension, or comma separated ones as in --asset-extensions.
+            self.asset_extensions = [i.strip() for i in self.asset_extensions.split(",")]
 
         player_yaml = yaml.get("players", {'__class__': 'TwoPlayers'})
         self.players = self._create_object(
@@ -50,8 +368,13 @@ class TabletopGenerator:
                 class_factory=components
             )
             self.components[component.get_key()] = component
+        self.components = self.players.seat(self.components)
+
+        return yaml.get("layout", [])
+
+    def _create_layout(self, layout_yaml):
+        from ttgen.tabletop_generator.layout import Layout
 
-        layout_yaml = yaml.get("layout", [])
         self.layout = []
         for i_layout_dict in layout_yaml:
             c = Layout.create_layout(i_layout_dict, self.components)
@@ -72,20 +395,91 @@ class TabletopGenerator:
     def apply_layout(self):
         """
         Layout is applied on the ttgen components, not the tabletop-simulator.
+
+        The layout annotations are drawn on the table on every compile (see
+        `CompileContext.annotations`).
         """
-        table = self.components['table']
         for i_layout in self.layout:
-            i_layout.set_position(0.0, 0.0)
-            table.annotations.update(i_layout.annotations)
+            i_layout.apply(0.0, 0.0)
 
-    def compile(self, dest_directory: Path):
+    def compile(
+        self,
+        dest_directory: Path,
+        debug=False,
+        compact=False,
+        skip_defaults=False,
+        use_cache=True,
+        optimize_images=False,
+        max_texture=None,
+        jpeg_quality=None,
+        guids="random",
+    ):
         """
         Generate tabletop-simulator from the current ttgen players and
-        components.
+        components, and save it on the destination directory.
 
         :param dest_directory:
+        :param debug: Pretty-prints the generated save on stdout.
+        :param compact: Writes minified JSON.
+        :param skip_defaults: Leaves out fields holding empty defaults.
+        :param use_cache: Reuses the objects of unchanged components from the
+            build cache (see `BuildCache`).
+        :param optimize_images: Downscales and recompresses the component
+            images (see `ImageOptimizer`).
+        :param max_texture: Default maximum image size when optimizing images.
+        :param jpeg_quality: JPEG quality when optimizing images.
+        :param guids: "random" or "deterministic" GUIDs (see `GuidAllocator`).
         :return:
         """
+        with self.timings.phase("generate"):
+            ttsim = self.generate(
+                use_cache=use_cache,
+                optimize_images=optimize_images,
+                max_texture=max_texture,
+                jpeg_quality=jpeg_quality,
+                guids=guids,
+            )
+
+        with self.timings.phase("save"):
+            # Save the generated file on destination directory.
+            output_filename = Path(dest_directory) / f"{self.name}.json"
+            changed = ttsim.save(
+                output_filename,
+                debug=debug,
+                compact=compact,
+                skip_defaults=skip_defaults,
+            )
+            if not changed:
+                click.echo(f"{output_filename} is up to date.")
+
+            # DEBUG: Saves the generated file locally for debugging.
+            ttsim.save(self._source_filename.parent / f"{self.name}.json")
+
+    def generate(
+        self,
+        use_cache=True,
+        optimize_images=False,
+        max_texture=None,
+        jpeg_quality=None,
+        guids="random",
+    ):
+        """
+        Generate tabletop-simulator from the current ttgen players and
+        components.
+
+        See `compile` for the parameters.
+
+        :return TabletopSimulator:
+        """
+        from ttgen.tabletop_generator.assets import AssetIndex
+        from ttgen.tabletop_generator.build_cache import CACHE_DIRNAME, BuildCache
+        from ttgen.tabletop_generator.context import CompileContext
+        from ttgen.tabletop_generator.images import (
+            DEFAULT_MAX_TEXTURE,
+            DEFAULT_QUALITY,
+            ImageOptimizer,
+        )
+        from ttgen.tabletop_generator.guids import GuidAllocator
         from ttgen.tabletop_simulator import TabletopSimulator
 
         click.echo("Compiling...")
@@ -95,19 +489,56 @@ class TabletopGenerator:
         ttsim.GameMode = self.name
 
         # Ttgen components are added into tabletop-simulator ObjectStates.
+        base_dir = self._source_filename.parent.absolute()
+        cache = BuildCache(base_dir / CACHE_DIRNAME) if use_cache else None
+        context = CompileContext(
+            base_dir,
+            asset_index=AssetIndex(base_dir, self.asset_extensions),
+            guid_allocator=GuidAllocator(self.name if guids == "deterministic" else None),
+        )
+        for i_layout in self.layout:
+            context.annotations.update(i_layout.annotations)
         for i_component in self.components.values():
-            ttsim.ObjectStates += i_component.generate(
-                dest_directory=self._source_filename.parent.absolute()
+            i_component.annotate(context)
+
+        # Images are optimized in parallel before the components reference them.
+        if optimize_images:
+            context.image_optimizer = ImageOptimizer(
+                base_dir / CACHE_DIRNAME / "images",
+                max_texture=max_texture or DEFAULT_MAX_TEXTURE,
+                quality=jpeg_quality or DEFAULT_QUALITY,
             )
+            for i_component in self.components.values():
+                for i_path in i_component.get_image_paths():
+                    filename = context.find_image(i_path)
+                    if filename is not None:
+                        context.image_optimizer.add(filename, i_component.max_texture)
+            context.image_optimizer.run()
 
-        # Ttgen players generate the tabletop-simulator HandTransforms
-        ttsim.Hands.HandTransforms += self.players.generate()
+        for i_component in self.components.values():
+            with self.timings.component(i_component), \
+                    context.guid_allocator.scope(i_component.get_key()):
+                if cache is None:
+                    ttsim.ObjectStates += i_component.generate_instances(context)
+                else:
+                    ttsim.ObjectStates += cache.generate(i_component, context)
+        if cache is not None:
+            click.echo(f"Build cache: {cache.hits} hits, {cache.misses} misses.")
+        context.asset_index.check()
 
-        # Save the generated file on destination directory.
-        ttsim.save(Path(dest_directory) / f"{self.name}.json")
+        self.image_report = None
+        if context.image_optimizer is not None:
+            self.image_report = count, source_bytes, optimized_bytes = (
+                context.image_optimizer.report()
+            )
+            click.echo(
+                f"Images: {count} optimized, {source_bytes - optimized_bytes} bytes saved"
+                f" ({source_bytes} -> {optimized_bytes})."
+            )
 
-        # DEBUG: Saves the generated file locally for debugging.
-        ttsim.save(self._source_filename.parent / f"{self.name}.json")
+        # Ttgen players generate the tabletop-simulator HandTransforms
+        ttsim.Hands.HandTransforms += self.players.generate()
+        return ttsim
 
 
 if __name__ == "__main__":
@@ -3,39 +3,102 @@ from dataclasses_json import DataClassJsonMixin
 
 
 def dataclass_from_dict(class_, **d):
+    """
+    Creates a `class_` instance from the given dict, converting nested dicts
+    and lists into the dataclasses declared on the fields type annotations.
 
-    def _dataclass_from_dict(klass, d):
-
-        if is_dataclass(d):
-            return d
-
-        try:
-            fields_ = fields(klass)
-        except TypeError:
-            origin = getattr(klass, '__origin__', None)
-
-            if origin is list:
-                value_klass = klass.__args__[0]
-                return [
-                    _dataclass_from_dict(value_klass, i)
-                    for i in d
-                ]
-
-            if origin is dict:
-                value_klass = klass.__args__[1]
-                return {
-                    i: _dataclass_from_dict(value_klass, j)
-                    for i, j in d.items()
-                }
-
-            return d  # Not a dataclass field
-        else:
-            fieldtypes = {f.name: f.type for f in fields_}
-            return klass(
-                **{i: _dataclass_from_dict(fieldtypes[i], j) for i, j in d.items()}
-            )
-
-    return _dataclass_from_dict(class_, d)
+    Values that are already dataclass instances are used as is.
+    """
+    return get_converter(class_)(d)
+
+
+_CONVERTERS = {}
+
+
+def _identity(value):
+    return value
+
+
+def get_converter(klass):
+    """
+    Returns the converter function for the given type, compiling it on first
+    use.
+
+    A dataclass converter is a generated function that only visits the fields
+    that need conversion (dataclasses, lists and dicts of dataclasses), so the
+    fields and type annotations are inspected once per class instead of once
+    per call.
+    """
+    try:
+        return _CONVERTERS[klass]
+    except KeyError:
+        pass
+    except TypeError:  # Unhashable type annotation.
+        return _identity
+
+    if is_dataclass(klass):
+        return _compile_dataclass_converter(klass)
+
+    origin = getattr(klass, '__origin__', None)
+    if not _needs_conversion(klass):
+        result = _identity  # Not a dataclass field
+    elif origin is list:
+        item_converter = get_converter(klass.__args__[0])
+
+        def result(d):
+            return [item_converter(i) for i in d]
+    else:
+        value_converter = get_converter(klass.__args__[1])
+
+        def result(d):
+            return {i: value_converter(j) for i, j in d.items()}
+
+    _CONVERTERS[klass] = result
+    return result
+
+
+def _compile_dataclass_converter(klass):
+    namespace = {"klass": klass}
+    lines = [
+        "def convert(d):",
+        "    if d.__class__ is not dict:",
+        "        return d",
+    ]
+    converted_fields = [
+        i for i in fields(klass) if _needs_conversion(i.type)
+    ]
+    if converted_fields:
+        lines.append("    d = d.copy()")
+    for i, i_field in enumerate(converted_fields):
+        lines += [
+            f"    if {i_field.name!r} in d:",
+            f"        d[{i_field.name!r}] = convert_{i}(d[{i_field.name!r}])",
+        ]
+    lines.append("    return klass(**d)")
+    exec("\n".join(lines), namespace)
+    result = namespace["convert"]
+
+    # Register before compiling the fields converters to support recursive
+    # dataclasses.
+    _CONVERTERS[klass] = result
+    for i, i_field in enumerate(converted_fields):
+        namespace[f"convert_{i}"] = get_converter(i_field.type)
+    return result
+
+
+def _needs_conversion(klass):
+    """
+    Whether values of the given type are converted: dataclasses and lists or
+    dicts of them. Anything else is used as is.
+    """
+    if is_dataclass(klass):
+        return True
+    origin = getattr(klass, '__origin__', None)
+    if origin is list:
+        return _needs_conversion(klass.__args__[0])
+    if origin is dict:
+        return _needs_conversion(klass.__args__[1])
+    return False
 
 
 @dataclass
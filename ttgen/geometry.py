@@ -0,0 +1,96 @@
+"""
+Lightweight float-based 2D geometry shared by the annotations and layouts.
+
+Coordinates are rounded to 15 significant digits, which is the precision the
+generated saves have always carried.
+"""
+import math
+from typing import NamedTuple
+
+
+PRECISION = 15
+
+
+def _round(value):
+    return float(f"{value:.{PRECISION}g}")
+
+
+class Point(NamedTuple):
+    x: float = 0.0
+    y: float = 0.0
+
+    @classmethod
+    def create(cls, x, y):
+        return cls(_round(x), _round(y))
+
+
+class Polygon:
+
+    __slots__ = ("vertices",)
+
+    def __init__(self, *vertices):
+        self.vertices = tuple(Point.create(x, y) for x, y in vertices)
+
+    def __repr__(self):
+        return f"Polygon{self.vertices!r}"
+
+    def __eq__(self, other):
+        if not isinstance(other, Polygon):
+            return NotImplemented
+        return self.vertices == other.vertices
+
+    def __hash__(self):
+        return hash(self.vertices)
+
+
+class Rect(NamedTuple):
+    """
+    An axis-aligned rectangle given by its top-left corner and size.
+    """
+    x: float
+    y: float
+    w: float
+    h: float
+
+    @classmethod
+    def centered(cls, x, y, w, h):
+        return cls(x - (w / 2.0), y - (h / 2.0), w, h)
+
+    def to_polygon(self):
+        x, y, w, h = self
+        return Polygon((x, y), (x + w, y), (x + w, y + h), (x, y + h))
+
+
+class Affine(NamedTuple):
+    """
+    A 2D affine transform: (x, y) -> (a * x + b * y + c, d * x + e * y + f).
+    """
+    a: float
+    b: float
+    c: float
+    d: float
+    e: float
+    f: float
+
+    @classmethod
+    def create(cls, scale=(1.0, 1.0), rotation=0.0, translation=(0.0, 0.0), origin=(0.0, 0.0)):
+        """
+        Returns the transform moving `origin` to (0, 0), then scaling, rotating
+        clockwise by `rotation` degrees (as tabletop-simulator rotY) and
+        translating.
+        """
+        sx, sy = scale
+        angle = math.radians(rotation)
+        cos, sin = math.cos(angle), math.sin(angle)
+        a, b = sx * cos, sy * sin
+        d, e = -sx * sin, sy * cos
+        ox, oy = origin
+        tx, ty = translation
+        return cls(a, b, tx - (a * ox) - (b * oy), d, e, ty - (d * ox) - (e * oy))
+
+    def apply(self, points):
+        """
+        Returns the given (x, y) points transformed, in a single pass.
+        """
+        a, b, c, d, e, f = self
+        return [(a * x + b * y + c, d * x + e * y + f) for x, y in points]
@@ -0,0 +1,141 @@
+"""
+Profiling hooks for `ttgen compile --profile`.
+
+Records the wall time and the peak memory per phase and per component
+`generate`, along with a cProfile of the whole run.
+"""
+import cProfile
+import json
+import time
+import tracemalloc
+from contextlib import contextmanager
+
+from ttgen.timings import Timings
+
+
+class Profiler(Timings):
+    """
+    Timings that also record the peak memory (as traced by tracemalloc, above
+    the memory in use at the start) and the time of each component `generate`.
+    The peaks need Python 3.9 (`tracemalloc.reset_peak`), they are None before.
+
+    Measures between `start` and `stop` only.
+    """
+
+    def __init__(self):
+        super().__init__()
+        self.peaks = {}
+        self.components = []
+        self._profile = cProfile.Profile()
+        # The [start memory, peak memory] of the running measures, outermost
+        # first.
+        self._measures = []
+
+    def start(self):
+        tracemalloc.start()
+        self._profile.enable()
+
+    def stop(self):
+        self._profile.disable()
+        tracemalloc.stop()
+
+    @contextmanager
+    def phase(self, name):
+        result = []
+        try:
+            with self._measure(result):
+                yield
+        finally:
+            self.phases[name] = self.phases.get(name, 0.0) + result[0]
+            if result[1] is None or self.peaks.get(name, 0) is None:
+                self.peaks[name] = None
+            else:
+                self.peaks[name] = max(self.peaks.get(name, 0), result[1])
+
+    @contextmanager
+    def component(self, component):
+        result = []
+        try:
+            with self._measure(result):
+                yield
+        finally:
+            self.components.append(
+                dict(
+                    key=component.get_key(),
+                    class_name=component.__class__.__name__,
+                    seconds=result[0],
+                    peak_bytes=result[1],
+                )
+            )
+
+    @contextmanager
+    def _measure(self, result):
+        """
+        Fills the given list with the elapsed seconds and the peak bytes once
+        the context exits.
+        """
+        tracing = tracemalloc.is_tracing() and hasattr(tracemalloc, "reset_peak")
+        if tracing:
+            # The peak is reset for this measure, the running ones keep theirs.
+            memory = self._update_peaks()
+            tracemalloc.reset_peak()
+            self._measures.append([memory, memory])
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            result.append(time.perf_counter() - start)
+            if tracing:
+                self._update_peaks()
+                memory, peak = self._measures.pop()
+                result.append(peak - memory)
+            else:
+                result.append(None)
+
+    def _update_peaks(self):
+        memory, peak = tracemalloc.get_traced_memory()
+        for i_measure in self._measures:
+            i_measure[1] = max(i_measure[1], peak)
+        return memory
+
+    def get_report(self, game=""):
+        """
+        Returns the profile as a JSON-serializable dict: the phases, the
+        components and the totals per component class, slowest first.
+        """
+        classes = {}
+        for i_component in self.components:
+            totals = classes.setdefault(
+                i_component["class_name"],
+                dict(class_name=i_component["class_name"], count=0, seconds=0.0, peak_bytes=0),
+            )
+            totals["count"] += 1
+            totals["seconds"] += i_component["seconds"]
+            if i_component["peak_bytes"] is None or totals["peak_bytes"] is None:
+                totals["peak_bytes"] = None
+            else:
+                totals["peak_bytes"] = max(totals["peak_bytes"], i_component["peak_bytes"])
+
+        def _slowest_first(items):
+            return sorted(items, key=lambda x: x["seconds"], reverse=True)
+
+        return dict(
+            game=game,
+            phases=[
+                dict(name=i, seconds=j, peak_bytes=self.peaks.get(i))
+                for i, j in self.phases.items()
+            ],
+            components=_slowest_first(self.components),
+            component_classes=_slowest_first(classes.values()),
+        )
+
+    def dump(self, filename, game=""):
+        """
+        Writes the profile: the `get_report` JSON for .json files, a pstats
+        dump (see `pstats.Stats`) otherwise.
+        """
+        if str(filename).endswith(".json"):
+            with open(filename, "w") as oss:
+                json.dump(self.get_report(game), oss, indent=2)
+        else:
+            self._profile.dump_stats(str(filename))
@@ -0,0 +1,214 @@
+"""
+Compile service: a local HTTP server compiling specs on warm workers.
+
+Endpoints:
+
+- `POST /compile`: compiles the spec of the JSON request body and returns the
+  generated save JSON. The body holds `spec` (the spec YAML), `asset_dir` (the
+  game directory the images are resolved against) and optionally `guids`
+  ("random" or "deterministic").
+- `GET /metrics`: request counts and latencies, as JSON.
+
+Specs are compiled on a pool of worker processes that import ttgen once, so a
+request doesn't pay the interpreter start and import time. Requests beyond the
+concurrency limit are rejected with a 503 instead of queueing up.
+"""
+import json
+import threading
+import time
+from collections import deque
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from pathlib import Path
+
+
+# Number of latencies kept for the percentiles.
+LATENCY_SAMPLES = 1000
+
+
+def compile_request(spec, asset_dir, guids="random"):
+    """
+    Compiles a spec on a worker process.
+
+    :return: (save JSON, None) or (None, error message). Errors are returned
+        rather than raised, since not every exception survives pickling.
+    """
+    import contextlib
+    import io
+    import os
+    from ttgen.cli import TabletopGenerator
+    from ttgen.tabletop_simulator.json_writer import dump
+
+    try:
+        with open(os.devnull, "w") as devnull, contextlib.redirect_stdout(devnull):
+            ttg = TabletopGenerator(Path(asset_dir) / "spec.yaml", source=spec)
+            # No build cache: it would be written into the client directory,
+            # from concurrent requests.
+            ttsim = ttg.generate(use_cache=False, guids=guids)
+        oss = io.StringIO()
+        dump(ttsim, oss)
+        return oss.getvalue(), None
+    except Exception as e:
+        return None, f"{e.__class__.__name__}: {e}"
+
+
+class Metrics:
+    """
+    Thread-safe request counters and latencies.
+    """
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._latencies = deque(maxlen=LATENCY_SAMPLES)
+        self.requests = 0
+        self.errors = 0
+        self.rejected = 0
+        self.in_flight = 0
+
+    def start(self):
+        with self._lock:
+            self.requests += 1
+            self.in_flight += 1
+
+    def finish(self, elapsed, error=False):
+        with self._lock:
+            self.in_flight -= 1
+            self.errors += int(error)
+            self._latencies.append(elapsed)
+
+    def reject(self):
+        with self._lock:
+            self.requests += 1
+            self.rejected += 1
+
+    def report(self):
+        with self._lock:
+            latencies = sorted(self._latencies)
+            result = dict(
+                requests=self.requests,
+                errors=self.errors,
+                rejected=self.rejected,
+                in_flight=self.in_flight,
+            )
+
+        def _percentile(p):
+            return latencies[min(len(latencies) - 1, int(len(latencies) * p))] * 1000.0
+
+        result["latency_ms"] = dict(
+            count=len(latencies),
+            mean=sum(latencies) * 1000.0 / len(latencies) if latencies else 0.0,
+            p50=_percentile(0.5) if latencies else 0.0,
+            p95=_percentile(0.95) if latencies else 0.0,
+            max=latencies[-1] * 1000.0 if latencies else 0.0,
+        )
+        return result
+
+
+class CompileServer(ThreadingHTTPServer):
+    """
+    :param address: The (host, port) to listen on, port 0 picks a free one.
+    :param jobs: Number of worker processes, defaults to one per core.
+    :param concurrency: Maximum number of compiles running or waiting for a
+        worker, defaults to the number of workers.
+    :param timeout: Seconds a compile may take before failing.
+    """
+
+    daemon_threads = True
+
+    def __init__(self, address, jobs=None, concurrency=None, timeout=60.0):
+        import os
+        from multiprocessing import Pool
+        from ttgen.cli import import_generator
+
+        super().__init__(address, _Handler)
+        jobs = jobs or os.cpu_count()
+        import_generator()
+        self.pool = Pool(jobs, initializer=import_generator)
+        self.slots = threading.BoundedSemaphore(concurrency or jobs)
+        self.timeout = timeout
+        self.metrics = Metrics()
+
+    def server_close(self):
+        super().server_close()
+        self.pool.terminate()
+        self.pool.join()
+
+    def compile(self, request):
+        """
+        Compiles the given request body.
+
+        :return: (HTTP status, response dict or save JSON)
+        """
+        spec = request.get("spec")
+        asset_dir = request.get("asset_dir")
+        guids = request.get("guids", "random")
+        if not isinstance(spec, str) or not isinstance(asset_dir, str):
+            return 400, {"error": "Expected the spec and asset_dir strings."}
+        if guids not in ("random", "deterministic"):
+            return 400, {"error": f"Invalid guids: {guids}."}
+        if not Path(asset_dir).is_dir():
+            return 400, {"error": f"Asset directory not found: {asset_dir}."}
+
+        if not self.slots.acquire(blocking=False):
+            self.metrics.reject()
+            return 503, {"error": "Too many concurrent compiles."}
+
+        def _release(_result):
+            # The slot is held until the worker is done, even past the timeout.
+            self.slots.release()
+
+        start = time.perf_counter()
+        try:
+            result = self.pool.apply_async(
+                compile_request,
+                (spec, asset_dir, guids),
+                callback=_release,
+                error_callback=_release,
+            )
+        except Exception:
+            self.slots.release()
+            raise
+        self.metrics.start()
+        try:
+            save, error = result.get(self.timeout)
+        except Exception as e:  # Timeout
+            save, error = None, f"{e.__class__.__name__}: {e}"
+        self.metrics.finish(time.perf_counter() - start, error=error is not None)
+
+        if error is not None:
+            return 422, {"error": error}
+        return 200, save
+
+
+class _Handler(BaseHTTPRequestHandler):
+
+    def do_GET(self):
+        if self.path == "/metrics":
+            self._respond(200, self.server.metrics.report())
+        else:
+            self._respond(404, {"error": "Not found."})
+
+    def do_POST(self):
+        if self.path != "/compile":
+            self._respond(404, {"error": "Not found."})
+            return
+
+        try:
+            length = int(self.headers.get("Content-Length", 0))
+            request = json.loads(self.rfile.read(length))
+        except ValueError:
+            self._respond(400, {"error": "Expected a JSON body."})
+            return
+        if not isinstance(request, dict):
+            self._respond(400, {"error": "Expected a JSON object."})
+            return
+        self._respond(*self.server.compile(request))
+
+    def _respond(self, status, body):
+        if not isinstance(body, str):
+            body = json.dumps(body)
+        contents = body.encode("UTF-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json")
+        self.send_header("Content-Length", str(len(contents)))
+        self.end_headers()
+        self.wfile.write(contents)
@@ -1,8 +1,7 @@
-from dataclasses import dataclass
-
-from sympy import Polygon, Point2D
+from dataclasses import dataclass, field
 
 from ttgen.dataclass_ import RgbType
+from ttgen.geometry import Point, Polygon, Rect
 
 
 class _BaseAnnotation:
@@ -14,16 +13,13 @@ class _BaseAnnotation:
 @dataclass
 class SnapPoint(_BaseAnnotation):
 
-    position: Point2D = Point2D()
+    position: Point = Point()
 
     def configure_surface(self, ttgen_table, ttsim_table):
+         from ttgen.dataclass_ import Point3D
          from ttgen.tabletop_simulator import AttachedSnapPoint
-         p = AttachedSnapPoint.from_dict(
-             Position=dict(
-                 x=float(self.position.x),
-                 y=ttgen_table.surface_y,
-                 z=float(self.position.y)
-             )
+         p = AttachedSnapPoint(
+             Position=Point3D(self.position.x, ttgen_table.surface_y, self.position.y)
          )
          ttsim_table.AttachedSnapPoints.append(p)
 
@@ -32,18 +28,18 @@ class SnapPoint(_BaseAnnotation):
 class Box(_BaseAnnotation):
 
     polygon: Polygon = Polygon((0, 0), (1, 0), (1, 1), (0, 1))
-    color: RgbType = RgbType()
+    color: RgbType = field(default_factory=RgbType)
     thickness: float = 0.02
 
     def configure_surface(self, ttgen_table, ttsim_table):
         from ttgen.tabletop_simulator import AttachedVectorLine
         points3 = [
             dict(
-                x=float(self.polygon.vertices[i].x),
+                x=i.x,
                 y=ttgen_table.surface_y,
-                z=float(self.polygon.vertices[i].y),
+                z=i.y,
             )
-            for i in range(4)
+            for i in self.polygon.vertices
         ]
         a = AttachedVectorLine.from_dict(
             points3=points3,
@@ -53,6 +49,28 @@ class Box(_BaseAnnotation):
         ttsim_table.AttachedVectorLines.append(a)
 
 
+@dataclass
+class Line(_BaseAnnotation):
+    """
+    An open polyline, unlike the closed `Box`.
+    """
+
+    points: tuple = ()
+    color: RgbType = field(default_factory=RgbType)
+    thickness: float = 0.02
+
+    def configure_surface(self, ttgen_table, ttsim_table):
+        from ttgen.dataclass_ import Point3D
+        from ttgen.tabletop_simulator import AttachedVectorLine
+        a = AttachedVectorLine(
+            points3=[Point3D(i.x, ttgen_table.surface_y, i.y) for i in self.points],
+            color=self.color,
+            thickness=self.thickness,
+            loop=False,
+        )
+        ttsim_table.AttachedVectorLines.append(a)
+
+
 class Annotations:
 
     def __init__(self):
@@ -66,13 +84,34 @@ class Annotations:
 
     def add_snap_point(self, x, y):
         a = SnapPoint(
-            position=Point2D(x, y)
+            position=Point.create(x, y)
         )
         self._annotations.append(a)
 
     def add_box(self, x, y, w, h, color):
         a = Box(
-            polygon=Polygon((x, y), (x + w, y), (x + w, y + h), (x, y + h)),
+            polygon=Rect(x, y, w, h).to_polygon(),
             color=color,
         )
         self._annotations.append(a)
+
+    def add_snap_points(self, points):
+        """
+        Adds a snap point on each of the given (x, y) points.
+        """
+        self._annotations += [SnapPoint(position=Point.create(x, y)) for x, y in points]
+
+    def add_boxes(self, rects, color):
+        """
+        Adds a box for each of the given `Rect`, all of the same color.
+        """
+        self._annotations += [Box(polygon=i.to_polygon(), color=color) for i in rects]
+
+    def add_lines(self, polylines, color):
+        """
+        Adds an open line through the (x, y) points of each of the given
+        polylines, all of the same color.
+        """
+        self._annotations += [
+            Line(points=tuple(Point.create(x, y) for x, y in i), color=color) for i in polylines
+        ]
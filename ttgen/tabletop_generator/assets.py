@@ -0,0 +1,119 @@
+"""
+Index of the image assets of a game directory.
+"""
+import os
+from contextlib import contextmanager
+from pathlib import Path
+
+
+DEFAULT_EXTENSIONS = (".png", ".jpg", ".jpeg")
+
+
+def process_map(function, args_list, jobs=None):
+    """
+    Calls `function` with each tuple of `args_list`, over a process pool when
+    there is more than one call.
+
+    Runs serially inside daemonic processes (eg.: the `compile-all` workers),
+    which cannot start children.
+    """
+    import multiprocessing
+
+    args_list = list(args_list)
+    if len(args_list) > 1 and not multiprocessing.current_process().daemon:
+        from concurrent.futures import ProcessPoolExecutor
+
+        with ProcessPoolExecutor(max_workers=jobs) as executor:
+            return list(executor.map(function, *zip(*args_list)))
+    return [function(*i) for i in args_list]
+
+
+@contextmanager
+def replacing(filename):
+    """
+    Yields a unique temporary filename next to `filename`, which replaces it
+    when the context exits without error. Concurrent compiles writing the same
+    file never see (or leave) a partial file.
+    """
+    import tempfile
+
+    filename = Path(filename)
+    fd, tmp_filename = tempfile.mkstemp(
+        dir=filename.parent, prefix=f"{filename.name}.", suffix=".tmp"
+    )
+    os.close(fd)
+    try:
+        yield Path(tmp_filename)
+        # Temporary files are private (0600), generated files get the default mode.
+        umask = os.umask(0)
+        os.umask(umask)
+        os.chmod(tmp_filename, 0o666 & ~umask)
+        os.replace(tmp_filename, filename)
+    except BaseException:
+        if os.path.exists(tmp_filename):
+            os.unlink(tmp_filename)
+        raise
+
+
+class MissingAssetsError(RuntimeError):
+
+    def __init__(self, base_dir, paths):
+        self.base_dir = base_dir
+        self.paths = paths
+        lines = "\n".join(f"  - {base_dir}/{i}" for i in paths)
+        super().__init__(f"Image files not found ({len(paths)}):\n{lines}")
+
+
+class AssetIndex:
+    """
+    Lists the files of a game directory once, so assets are resolved without
+    touching the filesystem again.
+
+    Assets are looked up by their path without extension (eg.: decks/level_1),
+    trying the extensions in priority order. The lookup ignores case, like the
+    Windows filesystems the mods are usually played from. Missing assets are
+    collected and reported together by `check`.
+
+    :param base_dir: The game directory.
+    :param extensions: The image extensions, in priority order.
+    """
+
+    def __init__(self, base_dir, extensions=DEFAULT_EXTENSIONS):
+        self.base_dir = Path(base_dir)
+        self.extensions = tuple(extensions)
+        self.missing = []
+        # Lowercase relative filename: relative filename.
+        self._files = {}
+
+        for i_dirpath, i_dirnames, i_filenames in os.walk(self.base_dir):
+            # Skip hidden directories such as the build cache.
+            i_dirnames[:] = [i for i in i_dirnames if not i.startswith(".")]
+            relative = Path(i_dirpath).relative_to(self.base_dir).as_posix()
+            prefix = "" if relative == "." else relative + "/"
+            self._files.update((f"{prefix}{i}".lower(), prefix + i) for i in i_filenames)
+
+    def find(self, path):
+        """
+        Returns the asset filename for the given path, None if not found.
+        """
+        for i_extension in self.extensions:
+            filename = self._files.get(f"{path}{i_extension}".lower())
+            if filename is not None:
+                return self.base_dir / filename
+        return None
+
+    def resolve(self, path):
+        """
+        Like `find`, but records the path as missing when not found.
+        """
+        result = self.find(path)
+        if result is None and path not in self.missing:
+            self.missing.append(path)
+        return result
+
+    def check(self):
+        """
+        Raises MissingAssetsError listing every asset that could not be resolved.
+        """
+        if self.missing:
+            raise MissingAssetsError(self.base_dir, self.missing)
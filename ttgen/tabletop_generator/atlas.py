@@ -0,0 +1,128 @@
+"""
+Deck atlas builder: packs a folder of card images into tabletop-simulator deck
+sheets.
+
+A sheet holds up to 10x7 cards, the last slot being reserved by
+tabletop-simulator for the hidden card, so decks with more than 69 cards are
+split over multiple sheets (one CustomDeck entry each).
+
+Requires Pillow.
+"""
+import json
+import math
+from pathlib import Path
+from typing import NamedTuple, Tuple
+
+from ttgen.tabletop_generator.assets import process_map, replacing
+
+
+ATLAS_DIRNAME = "atlases"
+IMAGE_EXTENSIONS = (".png", ".jpg", ".jpeg")
+MAX_COLUMNS = 10
+MAX_ROWS = 7
+MAX_SHEET_CARDS = MAX_COLUMNS * MAX_ROWS - 1
+JPEG_QUALITY = 90
+
+
+class Sheet(NamedTuple):
+    filename: Path
+    cards: Tuple[Path, ...]
+    num_width: int
+    num_height: int
+
+
+def list_cards(cards_dir):
+    """
+    Returns the card images of the given directory, sorted by name.
+    """
+    result = [
+        i for i in Path(cards_dir).iterdir()
+        if i.is_file() and i.suffix.lower() in IMAGE_EXTENSIONS
+    ]
+    return sorted(result, key=lambda x: x.name)
+
+
+def plan_sheets(cards, output_dir, name):
+    """
+    Splits the cards into sheets of at most MAX_SHEET_CARDS cards, with the
+    smallest grid fitting each sheet (tabletop-simulator needs at least 2x2).
+    """
+    result = []
+    for i, i_start in enumerate(range(0, len(cards), MAX_SHEET_CARDS)):
+        sheet_cards = tuple(cards[i_start:i_start + MAX_SHEET_CARDS])
+        num_width = max(2, min(MAX_COLUMNS, len(sheet_cards)))
+        num_height = max(2, math.ceil(len(sheet_cards) / num_width))
+        filename = Path(output_dir) / f"{name}_{i + 1}.jpg"
+        result.append(Sheet(filename, sheet_cards, num_width, num_height))
+    return result
+
+
+def sheet_digest(sheet):
+    from ttgen.tabletop_generator.build_cache import file_digest
+
+    contents = [sheet.num_width, sheet.num_height, JPEG_QUALITY]
+    contents += [(i.name, file_digest(i)) for i in sheet.cards]
+    return json.dumps(contents)
+
+
+def build_sheet(sheet):
+    """
+    Stitches the sheet cards, in rows, at the size of the first card.
+    """
+    try:
+        from PIL import Image
+    except ImportError:
+        raise RuntimeError("Deck atlases require Pillow (pip install Pillow).")
+
+    with Image.open(sheet.cards[0]) as first:
+        card_size = first.size
+    width, height = card_size
+    result = Image.new("RGB", (width * sheet.num_width, height * sheet.num_height))
+    for i, i_filename in enumerate(sheet.cards):
+        with Image.open(i_filename) as card:
+            card = card.convert("RGB")
+            if card.size != card_size:
+                card = card.resize(card_size, Image.LANCZOS)
+            row, column = divmod(i, sheet.num_width)
+            result.paste(card, (column * width, row * height))
+    sheet.filename.parent.mkdir(parents=True, exist_ok=True)
+    with replacing(sheet.filename) as tmp_filename:
+        result.save(tmp_filename, "JPEG", quality=JPEG_QUALITY)
+    return sheet.filename
+
+
+def build_atlas(cards_dir, output_dir, name, jobs=None):
+    """
+    Builds the sheets for the cards in the given directory, skipping the sheets
+    whose cards haven't changed since the last build.
+
+    Stale sheets are built in parallel on a process pool. The sheets and the
+    manifest are replaced atomically, so concurrent compiles of the same game
+    (eg.: on the compile server) don't interleave their writes.
+
+    :return list(Sheet):
+    """
+    output_dir = Path(output_dir)
+    cards = list_cards(cards_dir)
+    if not cards:
+        raise RuntimeError(f"No card images found in {cards_dir}.")
+    sheets = plan_sheets(cards, output_dir, name)
+
+    manifest_filename = output_dir / f"{name}.manifest.json"
+    try:
+        manifest = json.loads(manifest_filename.read_text())
+    except (OSError, ValueError):
+        manifest = {}
+
+    digests = {i.filename.name: sheet_digest(i) for i in sheets}
+    stale = [
+        i for i in sheets
+        if not i.filename.is_file() or manifest.get(i.filename.name) != digests[i.filename.name]
+    ]
+    process_map(build_sheet, [(i,) for i in stale], jobs)
+
+    if stale or manifest != digests:
+        output_dir.mkdir(parents=True, exist_ok=True)
+        with replacing(manifest_filename) as tmp_filename:
+            tmp_filename.write_text(json.dumps(digests, indent=2))
+    return sheets
@@ -0,0 +1,167 @@
+"""
+Build cache for incremental compiles.
+
+The tabletop-simulator objects generated by each component are pickled under
+the spec `.ttgen-cache/` directory, keyed by the component state (after the
+layout is applied), the ttgen version, the deck ids in use, the GUIDs mode
+and the image optimization settings. An entry is reused while the image files
+the component resolved are unchanged and its GUIDs are still free.
+"""
+import hashlib
+import pickle
+from pathlib import Path
+
+
+CACHE_DIRNAME = ".ttgen-cache"
+
+_VERSION = None
+
+
+def get_version():
+    """
+    Returns the installed ttgen version or, for development trees, a digest of
+    the ttgen sources.
+    """
+    global _VERSION
+
+    if _VERSION is None:
+        try:
+            from importlib.metadata import version
+        except ImportError:  # Python 3.7
+            from pkg_resources import get_distribution
+
+            def version(name):
+                return get_distribution(name).version
+
+        try:
+            _VERSION = version("ttgen")
+        except Exception:
+            digest = hashlib.sha1()
+            for i_filename in sorted(Path(__file__).parents[1].glob("**/*.py")):
+                digest.update(i_filename.read_bytes())
+            _VERSION = f"dev-{digest.hexdigest()}"
+    return _VERSION
+
+
+def file_digest(filename):
+    digest = hashlib.sha1()
+    with open(filename, "rb") as iss:
+        for i_chunk in iter(lambda: iss.read(1024 * 1024), b""):
+            digest.update(i_chunk)
+    return digest.hexdigest()
+
+
+class BuildCache:
+
+    def __init__(self, directory):
+        self.directory = Path(directory)
+        self.hits = 0
+        self.misses = 0
+        # Cleared when an entry can't be stored, the next ones aren't tried.
+        self.writable = True
+
+    def generate(self, component, context):
+        """
+        Returns the tabletop-simulator objects for the given component, reusing
+        the cached ones when possible.
+
+        :param CompileContext context:
+        """
+        key = self.get_key(component, context)
+        entry = self._load(key)
+        if (
+            entry is not None
+            and self._assets_unchanged(entry["assets"])
+            and context.guid_allocator.reserve(entry["guids"])
+        ):
+            self.hits += 1
+            context.deck_id += entry["deck_ids"]
+            return entry["object_states"]
+
+        self.misses += 1
+        deck_id = context.deck_id
+        guid_count = len(context.guid_allocator.allocated)
+        missing = len(context.asset_index.missing)
+        with context.record_assets() as assets:
+            result = component.generate_instances(context)
+        if len(context.asset_index.missing) > missing:
+            return result  # Never cache objects with unresolved images.
+
+        entry = dict(
+            assets=[self._asset_state(i) for i in sorted(set(assets))],
+            deck_ids=context.deck_id - deck_id,
+            guids=context.guid_allocator.allocated[guid_count:],
+            object_states=result,
+        )
+        self._store(key, entry)
+        return result
+
+    @classmethod
+    def get_key(cls, component, context):
+        image_optimizer = context.image_optimizer
+        digest = hashlib.sha1()
+        for i in (
+            get_version(),
+            str(context.base_dir),
+            str(context.deck_id),
+            context.guid_allocator.get_settings(),
+            image_optimizer.get_settings() if image_optimizer else "",
+            component.__class__.__qualname__,
+            component.get_fingerprint(context),
+        ):
+            digest.update(i.encode("UTF-8"))
+            digest.update(b"\0")
+        return digest.hexdigest()
+
+    def _load(self, key):
+        try:
+            with (self.directory / f"{key}.pickle").open("rb") as iss:
+                return pickle.load(iss)
+        except Exception:
+            # Missing, corrupt or unreadable (eg.: written by a newer Python) entries
+            # are regenerated.
+            return None
+
+    def _store(self, key, entry):
+        import os
+        import tempfile
+
+        if not self.writable:
+            return
+
+        tmp_filename = None
+        try:
+            self.directory.mkdir(parents=True, exist_ok=True)
+            # A unique temporary file, concurrent compiles may store the same entry.
+            with tempfile.NamedTemporaryFile(
+                dir=self.directory, suffix=".tmp", delete=False
+            ) as oss:
+                tmp_filename = oss.name
+                pickle.dump(entry, oss, protocol=4)
+            os.replace(tmp_filename, self.directory / f"{key}.pickle")
+        except OSError as e:
+            # The compile doesn't depend on the cache (eg.: read-only directory).
+            import click
+
+            click.echo(f"Build cache entries not stored: {e}", err=True)
+            self.writable = False
+            if tmp_filename is not None and os.path.exists(tmp_filename):
+                os.unlink(tmp_filename)
+
+    @classmethod
+    def _asset_state(cls, filename):
+        stat = Path(filename).stat()
+        return (str(filename), stat.st_size, stat.st_mtime_ns, file_digest(filename))
+
+    @classmethod
+    def _assets_unchanged(cls, assets):
+        for i_filename, i_size, i_mtime, i_digest in assets:
+            try:
+                stat = Path(i_filename).stat()
+            except OSError:
+                return False
+            if (stat.st_size, stat.st_mtime_ns) == (i_size, i_mtime):
+                continue
+            if stat.st_size != i_size or file_digest(i_filename) != i_digest:
+                return False
+        return True
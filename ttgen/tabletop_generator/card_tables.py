@@ -0,0 +1,173 @@
+"""
+Card tables: per-card data for a deck, one row per card.
+
+A card table is a CSV file with a header row, or a YAML list of mappings (or
+of lists, the first one being the header). Its columns are declared with
+their type on the deck `metadata` (eg.: {name: str, cost: int}), and every
+row is validated against them.
+
+Rows are read and converted one at a time with plain functions, so card
+databases with thousands of rows don't go through a schema library per row.
+"""
+import json
+import string
+
+
+def _parse_bool(value):
+    if isinstance(value, bool):
+        return value
+    text = str(value).strip().lower()
+    if text in ("true", "yes", "1"):
+        return True
+    if text in ("false", "no", "0", ""):
+        return False
+    raise ValueError(value)
+
+
+COLUMN_TYPES = {
+    "str": str,
+    "int": int,
+    "float": float,
+    "bool": _parse_bool,
+}
+
+
+def get_converters(columns):
+    """
+    Returns the converter function of each declared column.
+
+    :param dict columns: The declared {column: type name}.
+    """
+    result = {}
+    for i_column, i_type in columns.items():
+        try:
+            result[i_column] = COLUMN_TYPES[i_type]
+        except KeyError:
+            raise ValueError(
+                f"Invalid type for column {i_column}: {i_type}"
+                f" (expected one of {', '.join(COLUMN_TYPES)})."
+            )
+    return result
+
+
+def read_rows(filename, columns):
+    """
+    Yields the rows of the given card table, as dicts of the declared columns
+    converted to their type.
+
+    :param Path filename: A .csv, .yaml or .yml file.
+    :param dict columns: The declared {column: type name}.
+    :raises ValueError: If the table columns differ from the declared ones, or
+        a value doesn't convert to its column type.
+    """
+    converters = get_converters(columns)
+    if filename.suffix.lower() == ".csv":
+        raw_rows = _read_csv(filename)
+    else:
+        raw_rows = _read_yaml(filename)
+
+    for i_number, i_row in raw_rows:
+        if i_row.keys() != converters.keys():
+            raise ValueError(
+                f"{filename}:{i_number}: expected the columns {', '.join(columns)},"
+                f" got {', '.join(map(str, i_row))}."
+            )
+        result = {}
+        for j_column, j_converter in converters.items():
+            value = i_row[j_column]
+            if value is None:
+                raise ValueError(f"{filename}:{i_number}: missing value for column {j_column}.")
+            try:
+                result[j_column] = j_converter(value)
+            except (TypeError, ValueError):
+                raise ValueError(
+                    f"{filename}:{i_number}: invalid {columns[j_column]} for column"
+                    f" {j_column}: {value!r}."
+                )
+        yield result
+
+
+def read_card_texts(filename, columns, count, name_format="", description_format=""):
+    """
+    Yields the (Nickname, Description, LuaScriptState) of each card from the
+    given card table.
+
+    The Nickname and Description are formatted from the row columns (eg.:
+    "{name}"), the LuaScriptState holds the row as JSON.
+
+    :param int count: The number of cards, which must match the number of rows.
+    """
+    for i_format in (name_format, description_format):
+        fields_ = {i[1] for i in string.Formatter().parse(i_format) if i[1] is not None}
+        unknown = fields_.difference(columns)
+        if unknown:
+            raise ValueError(f"Unknown card table columns: {', '.join(sorted(unknown))}.")
+
+    rows = 0
+    for i_row in read_rows(filename, columns):
+        rows += 1
+        if rows > count:
+            raise ValueError(f"{filename}: more rows than cards ({count}).")
+        yield (
+            name_format.format(**i_row),
+            description_format.format(**i_row),
+            json.dumps(i_row),
+        )
+    if rows < count:
+        raise ValueError(f"{filename}: {rows} rows for {count} cards.")
+
+
+def _read_csv(filename):
+    import csv
+
+    with filename.open(newline="", encoding="utf-8-sig") as iss:
+        reader = csv.DictReader(iss)
+        for i_row in reader:
+            # The values beyond the header columns are listed under None.
+            extra = i_row.pop(None, None)
+            if extra:
+                raise ValueError(
+                    f"{filename}:{reader.line_num}: {len(i_row) + len(extra)} values"
+                    f" for {len(i_row)} columns."
+                )
+            yield reader.line_num, i_row
+
+
+def _read_yaml(filename):
+    """
+    Yields the (line, row) of the given YAML card table.
+
+    The rows are constructed one at a time from the composed document, whose
+    node marks give the source line of each row.
+    """
+    import yaml
+
+    loader_class = getattr(yaml, "CBaseLoader", yaml.BaseLoader)
+    with filename.open(encoding="utf-8-sig") as iss:
+        loader = loader_class(iss)
+        try:
+            document = loader.get_single_node()
+        finally:
+            loader.dispose()
+    if document is None:
+        return
+    if not isinstance(document, yaml.SequenceNode):
+        raise ValueError(f"{filename}: expected a list of rows.")
+
+    header = None
+    row_nodes = document.value
+    if row_nodes and isinstance(row_nodes[0], yaml.SequenceNode):
+        header = loader.construct_document(row_nodes[0])
+        row_nodes = row_nodes[1:]
+    for i_node in row_nodes:
+        i_number = i_node.start_mark.line + 1
+        i_row = loader.construct_document(i_node)
+        if header is not None and isinstance(i_row, list):
+            if len(i_row) != len(header):
+                raise ValueError(
+                    f"{filename}:{i_number}: {len(i_row)} values for {len(header)} columns."
+                )
+            i_row = dict(zip(header, i_row))
+        elif not isinstance(i_row, dict):
+            raise ValueError(f"{filename}:{i_number}: expected a mapping.")
+        yield i_number, i_row
@@ -1,52 +1,80 @@
 from dataclasses import dataclass, field
-from typing import Dict
+from typing import Dict, List
 
 from dataclasses_json import DataClassJsonMixin
 
 from ttgen.dataclass_ import Point3D
-from ttgen.tabletop_generator.annotations import Annotations
 from ttgen.tabletop_simulator import TabletopCustomBoard
 
 
-class Globals:
-    DECK_ID = 0
+class Schemas:
+    """
+    Caches the dataclasses-json schema of each component and layout class.
 
-    @classmethod
-    def get_deck_id(cls):
-        cls.DECK_ID += 1
-        return cls.DECK_ID
+    Building a schema is far more expensive than loading a dict with it, so
+    each class schema is built once per process.
+    """
+    CACHE = {}
+    TIMINGS = None
 
     @classmethod
-    def gen_guid(cls):
-        import uuid
-        return str(uuid.uuid4())[:6]
+    def load(cls, klass, d):
+        if cls.TIMINGS is None:
+            return cls.get_schema(klass).load(d)
+
+        import time
+
+        timing = cls.TIMINGS.setdefault(klass.__name__, [0, 0.0, 0.0])
+        start = time.perf_counter()
+        schema = cls.get_schema(klass)
+        loading = time.perf_counter()
+        result = schema.load(d)
+        timing[0] += 1
+        timing[1] += loading - start
+        timing[2] += time.perf_counter() - loading
+        return result
 
     @classmethod
-    def gen_image_url(cls, base_dir, path):
-        from pathlib import Path, PureWindowsPath
-
-        # TODO: Not hard-code this.
-        target_dir = f'D:\\Projects\\tabletop_generator\\games\\{base_dir.parts[-1]}'
+    def get_schema(cls, klass):
+        try:
+            return cls.CACHE[klass]
+        except KeyError:
+            result = cls.CACHE[klass] = klass.schema()
+            return result
 
-        for i_extension in (".png", ".jpg", '.jpeg'):
-            filename = Path(f"{base_dir}/{path}{i_extension}")
-            if filename.is_file():
-                filename = PureWindowsPath(
-                    f'{target_dir}/{path}{i_extension}'
-                )
-                break
-        else:
-            raise RuntimeError(f"Image file not found for {base_dir}/{path}")
+    @classmethod
+    def start_timings(cls):
+        """
+        Starts recording the number of loads, schema build time and load time
+        per class.
+        """
+        cls.TIMINGS = {}
 
-        return f"file:///{filename}"
+    @classmethod
+    def report_timings(cls):
+        """
+        Returns the recorded timings as (class name, loads, build seconds, load
+        seconds) rows, slowest first.
+        """
+        result = [(i,) + tuple(j) for i, j in cls.TIMINGS.items()]
+        return sorted(result, key=lambda x: x[2] + x[3], reverse=True)
 
 
 @dataclass
 class _Base(DataClassJsonMixin):
     name: str = ""
-    position: Point3D = Point3D(0.0, 0.0, 0.0)
-    rotation: Point3D = Point3D(0.0, 0.0, 0.0)
-    scale: Point3D = Point3D(1.0, 1.0, 1.0)
+    position: Point3D = field(default_factory=lambda: Point3D(0.0, 0.0, 0.0))
+    rotation: Point3D = field(default_factory=lambda: Point3D(0.0, 0.0, 0.0))
+    scale: Point3D = field(default_factory=lambda: Point3D(1.0, 1.0, 1.0))
+    # The images file name, when it differs from the component name (eg.: the
+    # per-player copies of a component, see `Players`).
+    image_name: str = ""
+    # Copies of the component, as offsets from its position: one per
+    # `instances` offset, or `repeat` copies `spacing` apart (see
+    # `generate_instances`).
+    repeat: int = 1
+    spacing: Point3D = field(default_factory=lambda: Point3D(2.5, 0.0, 0.0))
+    instances: List[Point3D] = field(default_factory=list)
 
     @property
     def _prefix(self):
@@ -56,36 +84,231 @@ class _Base(DataClassJsonMixin):
         return f"{self._prefix}:{self.name}"
 
     def get_path(self):
-        return f"{self._prefix}s/{self.name}"
+        return f"{self._prefix}s/{self.image_name or self.name}"
+
+    def get_fingerprint(self, context):
+        """
+        Returns a text identifying the component state, used as the build
+        cache key.
+        """
+        return repr(self)
+
+    def get_image_paths(self):
+        """
+        Returns the paths of the game directory images used by the component
+        (eg.: decks/level_1), without extension.
+        """
+        return []
 
     @classmethod
     def from_dict(cls, d, name):
-        result = cls.schema().load(d)
+        result = Schemas.load(cls, d)
         result.name = name
         return result
 
-    def generate(self, dest_directory):
+    def generate(self, context):
+        """
+        Returns the tabletop-simulator objects of the component.
+
+        :param CompileContext context:
+        """
         raise NotImplementedError
 
+    def get_instances(self):
+        """
+        Returns the offset of each copy of the component.
+        """
+        if self.instances:
+            return list(self.instances)
+        return [
+            Point3D(self.spacing.x * i, self.spacing.y * i, self.spacing.z * i)
+            for i in range(self.repeat)
+        ]
+
+    def annotate(self, context):
+        """
+        Adds the component annotations (eg.: snap points) to
+        `context.annotations`, drawn on the table. Called on every component
+        before any is generated.
+
+        :param CompileContext context:
+        """
+
+    def generate_instances(self, context):
+        """
+        Returns the tabletop-simulator objects of every copy of the component.
+
+        The objects are generated once, the copies differing only in their
+        transform and GUIDs: the other substructures (eg.: CustomImage) are
+        shared, and written once by the JSON writer.
+
+        :param CompileContext context:
+        """
+        result = self.generate(context)
+        offsets = self.get_instances()
+        if offsets == [Point3D(0.0, 0.0, 0.0)]:
+            return result
+
+        # Copied before moving the prototype, the first instance.
+        copies = [result] + [
+            [_copy_object(j, context) for j in result] for _i in offsets[1:]
+        ]
+        return [
+            _move_object(j_object, i_offset)
+            for i_offset, i_objects in zip(offsets, copies)
+            for j_object in i_objects
+        ]
+
+
+def _copy_object(obj, context):
+    """
+    Returns a shallow copy of the given object with new GUIDs, contained
+    objects included.
+    """
+    import copy
+
+    from ttgen.tabletop_simulator import TabletopCardList
+
+    result = copy.copy(obj)
+    result.GUID = context.gen_guid()
+    for i_name, i_value in vars(obj).items():
+        if i_name not in ("Transform", "ContainedObjects"):
+            _share(i_value)
+    contained = getattr(obj, "ContainedObjects", None)
+    if isinstance(contained, TabletopCardList):
+        result.ContainedObjects = contained.with_guids(context.gen_guid)
+    elif contained:
+        result.ContainedObjects = [_copy_object(i, context) for i in contained]
+    return result
+
+
+def _share(value):
+    # Marks the substructures of an object shared with its copies.
+    from ttgen.tabletop_simulator import _TabletopBase
+
+    if isinstance(value, _TabletopBase):
+        value.share()
+    elif isinstance(value, dict):
+        for i_value in value.values():
+            _share(i_value)
+
+
+def _move_object(obj, offset):
+    """
+    Moves the given object by the offset (ttgen coordinates, y being the
+    tabletop-simulator posZ), on a copy of its transform.
+    """
+    import copy
+
+    if offset == Point3D(0.0, 0.0, 0.0):
+        return obj
+    transform = obj.Transform = copy.copy(obj.Transform)
+    transform.posX += offset.x
+    transform.posY += offset.z
+    transform.posZ += offset.y
+    return obj
+
 
 @dataclass
 class Board(_Base):
     image_url: str = ""
     border: bool = True
-    # snap_points: List[int] = field(default_factory=list)
+    # Maximum image size when optimizing images, 0 for the compile default.
+    max_texture: int = 0
+    # Snap points and lines drawn on the table over the board, in image pixels
+    # by name: "x, y" and "x1, y1, x2, y2, ..." (see `annotate`).
+    snap_points: Dict[str, str] = field(default_factory=dict)
+    lines: Dict[str, str] = field(default_factory=dict)
+    # The image size in pixels ("WxH"), read from the image file when empty.
+    image_size: str = ""
+
+    def get_image_paths(self):
+        return [] if self.image_url else [self.get_path()]
+
+    def annotate(self, context):
+        """
+        Adds the board snap points and lines to the table annotations.
+
+        The image is fitted in the board keeping its aspect ratio, then scaled
+        with the board (tiles are always generated at the same scale). All the
+        points are converted to table coordinates with a single transform, then
+        offset for each copy of the board (see `get_instances`).
+        """
+        from ttgen.dataclass_ import RgbType
+        from ttgen.geometry import Affine
+
+        if not (self.snap_points or self.lines):
+            return
+
+        snap_points = [_parse_points(i, self.name) for i in self.snap_points.values()]
+        lines = [_parse_points(i, self.name) for i in self.lines.values()]
+        for i_name, i_points in zip(self.snap_points, snap_points):
+            if len(i_points) != 1:
+                raise ValueError(f"Board {self.name}: invalid snap point {i_name}.")
+
+        image_width, image_height = self._get_image_size(context)
+        pixel = min(self.width / image_width, self.height / image_height)
+        scale_x, scale_y = (self.scale.x, self.scale.z) if self.border else (1.0, 1.0)
+        transform = Affine.create(
+            scale=(pixel * scale_x, -pixel * scale_y),  # The image top is on +y.
+            rotation=self.rotation.y,
+            translation=(self.position.x, self.position.y),
+            origin=(image_width / 2.0, image_height / 2.0),
+        )
+        points = transform.apply(
+            [j for i in snap_points for j in i] + [j for i in lines for j in i]
+        )
+
+        snap_point_count = len(snap_points)
+        for i_offset in self.get_instances():
+            if i_offset.x or i_offset.y:
+                instance_points = [(x + i_offset.x, y + i_offset.y) for x, y in points]
+            else:
+                instance_points = points
+
+            context.annotations.add_snap_points(instance_points[:snap_point_count])
+            start = snap_point_count
+            polylines = []
+            for j_line in lines:
+                polylines.append(instance_points[start:start + len(j_line)])
+                start += len(j_line)
+            context.annotations.add_lines(polylines, color=RgbType())
+
+    def _get_image_size(self, context):
+        if self.image_size:
+            try:
+                width, height = (float(i) for i in self.image_size.lower().split("x"))
+            except ValueError:
+                raise ValueError(f"Board {self.name}: invalid image_size {self.image_size!r}.")
+            return width, height
+
+        filename = None if self.image_url else context.find_image(self.get_path())
+        if filename is None:
+            raise ValueError(
+                f"Board {self.name}: image_size is required for the snap points"
+                f" and lines of {self.image_url or self.get_path()}."
+            )
+        try:
+            from PIL import Image
+        except ImportError:
+            raise RuntimeError(
+                "Reading the board image size requires Pillow (pip install Pillow),"
+                " or set the board image_size."
+            )
+        with Image.open(filename) as image:
+            return image.size
 
-    def generate(self, dest_directory):
+    def generate(self, context):
         from ttgen.tabletop_simulator import TabletopCustomTile
 
-        if not self.image_url:
-            self.image_url = Globals.gen_image_url(dest_directory, self.get_path())
+        image_url = self.image_url or context.gen_image_url(self.get_path(), self.max_texture)
 
+        scale = self.scale
         if self.border:
             ttsim_class = TabletopCustomBoard
         else:
             ttsim_class = TabletopCustomTile
-            self.scale.x = 10.0
-            self.scale.z = 10.0
+            scale = Point3D(10.0, scale.y, 10.0)
 
         return [
             ttsim_class.from_dict(
@@ -94,16 +317,16 @@ class Board(_Base):
                     posY=5.0,  # Let it fall into the table.
                     posZ=self.position.y,
                     rotX=self.rotation.x,
-                    rotY=180.0 + self.rotation.y,
+                    rotY=(180.0 + self.rotation.y) % 360.0,
                     rotZ=self.rotation.z,
-                    scaleX=self.scale.x,
-                    scaleY=self.scale.y,
-                    scaleZ=self.scale.z,
+                    scaleX=scale.x,
+                    scaleY=scale.y,
+                    scaleZ=scale.z,
                 ),
                 CustomImage=dict(
-                    ImageURL=self.image_url,
+                    ImageURL=image_url,
                 ),
-                GUID=Globals.gen_guid(),
+                GUID=context.gen_guid(),
             )
         ]
 
@@ -116,59 +339,169 @@ class Board(_Base):
         return 10.0
 
 
+def _parse_points(text, board_name):
+    """
+    Returns the (x, y) points of the given "x1, y1, x2, y2, ..." text.
+    """
+    try:
+        values = [float(i) for i in str(text).split(",")]
+    except ValueError:
+        values = []
+    if not values or len(values) % 2:
+        raise ValueError(f"Board {board_name}: invalid points {text!r}.")
+    return list(zip(values[::2], values[1::2]))
+
+
 @dataclass
 class Deck(_Base):
     face_url: str = ""
     back_url: str = ""
     num_dim: str = "10x7"
+    # The `card_table` columns and their type: str, int, float or bool.
     metadata: Dict[str, str] = field(default_factory=dict)
     count: int = 52
+    # A directory of individual card images, packed into the deck sheets
+    # (face_url, num_dim and count are then computed from it).
+    cards_dir: str = ""
+    # Maximum image size when optimizing images, 0 for the compile default.
+    max_texture: int = 0
+    # A CSV or YAML file with a row of data per card (see `card_tables`). Each
+    # card gets its row as LuaScriptState, and a Nickname and Description
+    # formatted from it (eg.: "{name}").
+    card_table: str = ""
+    card_name: str = ""
+    card_description: str = ""
+
+    def get_fingerprint(self, context):
+        result = super().get_fingerprint(context)
+        if self.cards_dir:
+            from ttgen.tabletop_generator.atlas import list_cards
+
+            # The assets only hold the card images found, adding one must
+            # regenerate the deck too.
+            cards_dir = context.base_dir / self.cards_dir
+            if cards_dir.is_dir():
+                result += repr([i.name for i in list_cards(cards_dir)])
+        return result
 
-    def generate(self, dest_directory):
-        from ttgen.tabletop_simulator import TabletopDeckCustom, TabletopCard
+    def get_image_paths(self):
+        result = []
+        if not (self.face_url or self.cards_dir):
+            result.append(self.get_path())
+        if not self.back_url:
+            result.append(self.get_path() + "_back")
+        return result
 
-        deck_id = Globals.get_deck_id()
+    def generate(self, context):
+        from ttgen.tabletop_simulator import TabletopCardList, TabletopDeckCustom
 
-        if not self.face_url:
-            self.face_url = Globals.gen_image_url(dest_directory, self.get_path())
-        if not self.back_url:
-            self.back_url = Globals.gen_image_url(dest_directory, self.get_path() + "_back")
-
-        cards = []
-        for i in range(self.count):
-            card_id = (100 * deck_id) + i
-            c = TabletopCard(
-                CardID=card_id,
-                GUID=Globals.gen_guid(),
+        if self.cards_dir:
+            sheets = self._build_atlas(context)
+        else:
+            face_url = self.face_url or context.gen_image_url(self.get_path(), self.max_texture)
+            num_dim = [int(i) for i in self.num_dim.split('x')]
+            sheets = [(face_url, num_dim[0], num_dim[1], self.count)]
+
+        back_url = self.back_url or context.gen_image_url(
+            self.get_path() + "_back", self.max_texture
+        )
+
+        card_texts = self._get_card_texts(context, sum(i[3] for i in sheets))
+
+        # Each sheet is a CustomDeck entry with its own deck id. Cards are
+        # (CardID, GUID, Nickname, Description, LuaScriptState) rows, see
+        # `TabletopCardList`.
+        cards = TabletopCardList()
+        custom_deck = {}
+        for i_face_url, i_num_width, i_num_height, i_count in sheets:
+            deck_id = context.get_deck_id()
+            custom_deck[str(deck_id)] = dict(
+                FaceURL=i_face_url,
+                BackURL=back_url,
+                NumWidth=i_num_width,
+                NumHeight=i_num_height,
             )
-            cards.append(c)
+            cards.rows += [
+                ((100 * deck_id) + i, context.gen_guid()) + next(card_texts)
+                for i in range(i_count)
+            ]
+        # Checks the card table has no rows left.
+        next(card_texts, None)
+
+        result = TabletopDeckCustom.from_dict(
+            Nickname=self.name,
+            Transform=dict(
+                posX=self.position.x,
+                posY=2.0,
+                posZ=self.position.y,
+                rotY=180.0,
+                rotZ=180.0,
+                scaleX=1.0,
+                scaleZ=1.0,
+            ),
+            DeckIDs=[i[0] for i in cards.rows],
+            CustomDeck=custom_deck,
+        )
+        result.ContainedObjects = cards
+        return [result]
 
-        num_dim = [int(i) for i in self.num_dim.split('x')]
+    def _get_card_texts(self, context, count):
+        """
+        Returns an iterator over the (Nickname, Description, LuaScriptState)
+        of the cards, read from `card_table` when given.
+        """
+        import itertools
 
-        return [
-            TabletopDeckCustom.from_dict(
-                Nickname=self.name,
-                Transform=dict(
-                    posX=self.position.x,
-                    posY=2.0,
-                    posZ=self.position.y,
-                    rotY=180.0,
-                    rotZ=180.0,
-                    scaleX=1.0,
-                    scaleZ=1.0,
-                ),
-                DeckIDs=[i.CardID for i in cards],
-                CustomDeck={
-                    str(deck_id): dict(
-                        FaceURL=self.face_url,
-                        BackURL=self.back_url,
-                        NumWidth=num_dim[0],
-                        NumHeight=num_dim[1],
-                    )
-                },
-                ContainedObjects=cards
+        if not self.card_table:
+            return itertools.repeat(("", "", ""))
+
+        from ttgen.tabletop_generator.card_tables import read_card_texts
+
+        filename = context.base_dir / self.card_table
+        context.record_asset(filename)
+        return read_card_texts(
+            filename, self.metadata, count, self.card_name, self.card_description
+        )
+
+    def _build_atlas(self, context):
+        """
+        Packs the card images from `cards_dir` into deck sheets.
+
+        :return: (face url, num width, num height, count) for each sheet.
+        """
+        from ttgen.tabletop_generator.atlas import ATLAS_DIRNAME, build_atlas
+
+        sheets = build_atlas(
+            context.base_dir / self.cards_dir,
+            context.base_dir / ATLAS_DIRNAME,
+            self.name,
+        )
+
+        # The sheets are built after the image optimization stage, they are
+        # optimized here.
+        optimizer = context.image_optimizer
+        if optimizer is not None:
+            for i_sheet in sheets:
+                optimizer.add(i_sheet.filename, self.max_texture)
+            optimizer.run()
+
+        result = []
+        for i_sheet in sheets:
+            for i_card in i_sheet.cards:
+                context.record_asset(i_card)
+            filename = i_sheet.filename
+            if optimizer is not None:
+                filename = optimizer.get(filename, self.max_texture)
+            result.append(
+                (
+                    context.gen_file_url(filename),
+                    i_sheet.num_width,
+                    i_sheet.num_height,
+                    len(i_sheet.cards),
+                )
             )
-        ]
+        return result
+
 
 @dataclass
 class Model(_Base):
@@ -176,7 +509,7 @@ class Model(_Base):
     diffuse_url: str = ""
     collide_url: str = ""
 
-    def generate(self, dest_directory):
+    def generate(self, context):
         from ttgen.tabletop_simulator import TabletopCustomModel
 
         return [
@@ -190,7 +523,7 @@ class Model(_Base):
                     DiffuseURL = self.diffuse_url,
                     ColliderURL = self.collide_url,
                 ),
-                GUID=Globals.gen_guid(),
+                GUID=context.gen_guid(),
             )
         ]
 
@@ -199,12 +532,16 @@ class Model(_Base):
 class TokenStack(_Base):
     image_url: str = ""
     count: int = 1
+    # Maximum image size when optimizing images, 0 for the compile default.
+    max_texture: int = 0
+
+    def get_image_paths(self):
+        return [] if self.image_url else [self.get_path()]
 
-    def generate(self, dest_directory):
+    def generate(self, context):
         from ttgen.tabletop_simulator import TabletopCustomTokenStack
 
-        if not self.image_url:
-            self.image_url = Globals.gen_image_url(dest_directory, self.get_path())
+        image_url = self.image_url or context.gen_image_url(self.get_path(), self.max_texture)
 
         return [
             TabletopCustomTokenStack.from_dict(
@@ -216,10 +553,10 @@ class TokenStack(_Base):
                     scaleZ=0.5,
                 ),
                 CustomImage=dict(
-                    ImageURL=self.image_url,
+                    ImageURL=image_url,
                     WidthScale=0.0,
                 ),
-                GUID=Globals.gen_guid(),
+                GUID=context.gen_guid(),
             )
         ]
 
@@ -229,7 +566,7 @@ class TokenStack(_Base):
 #     count: int = 1
 #     image_url: str = ""
 #
-#     def generate(self, dest_directory):
+#     def generate(self, context):
 #         from ttgen.tabletop_simulator import TabletopCustomModel
 #
 #         return [
@@ -242,30 +579,32 @@ class TokenStack(_Base):
 #                     ImageURL=self.image_url,
 #                     WidthScale=0.0,
 #                 ),
-#                 GUID=Globals.gen_guid(),
+#                 GUID=context.gen_guid(),
 #             )
 #         ]
 
 
 class _BaseTable(_Base):
 
-    annotations: Annotations = Annotations()
-
     def get_key(self):
         return 'table'
 
+    def get_fingerprint(self, context):
+        return repr(self) + repr(list(context.annotations))
+
 
 @dataclass
 class FlexTable(_BaseTable):
 
     DEFAULT_SIZE = 18.0
+    MESH_URL = "http://cloud-3.steamusercontent.com/ugc/879750610978796176/4A5A65543B98BCFBF57E910D06EC984208223D38/"
 
     table_width: float = 18.0
     table_height: float = 18.0
 
     surface_y: float = 10.4915
 
-    def generate(self, dest_directory):
+    def generate(self, context):
         from ttgen.tabletop_simulator import TabletopCustomAssetBundle, TabletopCustomModel
 
         width_scale = self.table_width / self.DEFAULT_SIZE
@@ -298,7 +637,7 @@ class FlexTable(_BaseTable):
                     "TypeIndex": 4,
                     "LoopingEffectIndex": 0,
                 },
-                GUID=Globals.gen_guid()
+                GUID=context.gen_guid()
             )
             result.append(obj)
             obj = TabletopCustomAssetBundle.from_dict(
@@ -311,7 +650,7 @@ class FlexTable(_BaseTable):
                     "TypeIndex": 4,
                     "LoopingEffectIndex": 0,
                 },
-                GUID=Globals.gen_guid()
+                GUID=context.gen_guid()
             )
             result.append(obj)
 
@@ -323,11 +662,11 @@ class FlexTable(_BaseTable):
             ),
             Locked=True,
             CustomMesh=dict(
-                MeshURL="http://cloud-3.steamusercontent.com/ugc/879750610978796176/4A5A65543B98BCFBF57E910D06EC984208223D38/",
+                MeshURL=self.MESH_URL,
                 DiffuseURL="https://i.imgur.com/N0O6aqj.jpg",
             ),
         )
-        for i_annotation in self.annotations:
+        for i_annotation in context.annotations:
             i_annotation.configure_surface(self, obj)
         result.append(obj)
 
@@ -337,7 +676,7 @@ class FlexTable(_BaseTable):
 @dataclass
 class HardwoodTable(_BaseTable):
 
-    def generate(self, dest_directory):
+    def generate(self, context):
         from ttgen.tabletop_simulator import TabletopCustomAssetBundle
 
         result = []
@@ -361,7 +700,7 @@ class HardwoodTable(_BaseTable):
                 TypeIndex=4,
                 LoopingEffectIndex=0,
             ),
-            GUID=Globals.gen_guid()
+            GUID=context.gen_guid()
         )
         result.append(obj)
 
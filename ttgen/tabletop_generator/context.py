@@ -0,0 +1,101 @@
+"""
+Compile context: the state of a single compile.
+
+Deck ids, GUIDs, table annotations and asset lookups belong to the compile
+instead of the process, so specs can be compiled one after the other, or
+concurrently from threads, in the same process.
+"""
+from contextlib import contextmanager
+from pathlib import Path
+
+from ttgen.tabletop_generator.annotations import Annotations
+
+
+class CompileContext:
+    """
+    The state shared by the components while generating a save.
+
+    :param base_dir: The game directory, images are resolved against it.
+    :param asset_index: The `AssetIndex` of the game directory, created with
+        the default extensions when omitted.
+    :param guid_allocator: The `GuidAllocator`, random GUIDs when omitted.
+    :param image_optimizer: Replaces the images registered on this
+        `ImageOptimizer` by their optimized versions.
+    """
+
+    def __init__(self, base_dir, asset_index=None, guid_allocator=None, image_optimizer=None):
+        from ttgen.tabletop_generator.assets import AssetIndex
+        from ttgen.tabletop_generator.guids import GuidAllocator
+
+        self.base_dir = Path(base_dir)
+        self.asset_index = AssetIndex(self.base_dir) if asset_index is None else asset_index
+        self.guid_allocator = GuidAllocator() if guid_allocator is None else guid_allocator
+        self.image_optimizer = image_optimizer
+        # The snap points and boxes drawn on the table.
+        self.annotations = Annotations()
+        self.deck_id = 0
+        self.assets = None
+
+    def get_deck_id(self):
+        self.deck_id += 1
+        return self.deck_id
+
+    def gen_guid(self):
+        return self.guid_allocator.allocate()
+
+    @contextmanager
+    def record_assets(self):
+        """
+        Collects the local image files resolved by `gen_image_url` while the
+        context is active.
+        """
+        previous = self.assets
+        self.assets = result = []
+        try:
+            yield result
+        finally:
+            self.assets = previous
+
+    def find_image(self, path):
+        """
+        Returns the local image file for the given path, None if not found.
+        Missing images are collected on the asset index.
+        """
+        return self.asset_index.resolve(path)
+
+    def gen_image_url(self, path, max_texture=0):
+        """
+        Returns the URL of the image for the given path, optimized for the
+        given maximum texture size when images are optimized.
+        """
+        filename = self.find_image(path)
+        if filename is None:
+            return ""
+
+        if self.image_optimizer is not None:
+            optimized = self.image_optimizer.get(filename, max_texture)
+            if optimized is not None:
+                self.record_asset(filename)
+                filename = optimized
+
+        return self.gen_file_url(filename)
+
+    def gen_file_url(self, filename):
+        """
+        Returns the url for the given local file under the game directory,
+        recording it as an asset.
+        """
+        from pathlib import PureWindowsPath
+
+        # TODO: Not hard-code this.
+        target_dir = f'D:\\Projects\\tabletop_generator\\games\\{self.base_dir.parts[-1]}'
+
+        self.record_asset(filename)
+        filename = PureWindowsPath(
+            f'{target_dir}/{filename.relative_to(self.base_dir).as_posix()}'
+        )
+        return f"file:///{filename}"
+
+    def record_asset(self, filename):
+        if self.assets is not None:
+            self.assets.append(filename)
@@ -0,0 +1,69 @@
+"""
+GUID allocation for the generated tabletop-simulator objects.
+"""
+import hashlib
+import random
+from contextlib import contextmanager
+
+
+class GuidAllocator:
+    """
+    Allocates the GUIDs (6 hex digits) of a compile, never the same twice.
+
+    Random GUIDs come from a generator seeded once. Deterministic GUIDs are
+    derived from the seed, the key of the component being generated (see
+    `scope`) and a counter, so a rebuild gives each component the same GUIDs
+    whatever changed in the others.
+
+    :param seed: The deterministic GUIDs seed (eg.: the spec name), None for
+        random GUIDs.
+    """
+
+    def __init__(self, seed=None):
+        self.seed = seed
+        self.used = set()
+        self.allocated = []
+        self._random = random.Random() if seed is None else None
+        self._key = ""
+        self._count = 0
+
+    def get_settings(self):
+        return "random" if self.seed is None else f"deterministic:{self.seed}"
+
+    @contextmanager
+    def scope(self, key):
+        """
+        Derives the GUIDs allocated while the context is active from the given
+        component key.
+        """
+        previous = self._key, self._count
+        self._key, self._count = key, 0
+        try:
+            yield self
+        finally:
+            self._key, self._count = previous
+
+    def allocate(self):
+        while True:
+            if self._random is None:
+                self._count += 1
+                text = f"{self.seed}\0{self._key}\0{self._count}"
+                result = hashlib.sha1(text.encode("UTF-8")).hexdigest()[:6]
+            else:
+                result = f"{self._random.getrandbits(24):06x}"
+            if result not in self.used:
+                self.used.add(result)
+                self.allocated.append(result)
+                return result
+
+    def reserve(self, guids):
+        """
+        Marks the given GUIDs (eg.: reused from the build cache) as used.
+
+        :return bool: False, reserving none, if any of them is already used.
+        """
+        if not self.used.isdisjoint(guids):
+            return False
+        self.used.update(guids)
+        self.allocated += guids
+        return True
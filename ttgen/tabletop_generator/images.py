@@ -0,0 +1,107 @@
+"""
+Image optimization stage: downscales and recompresses the images used by the
+components before they are referenced by the generated save.
+
+Optimized images are stored under the build cache directory, named after the
+source contents digest and the optimization settings, so each image is
+processed once. Requires Pillow.
+"""
+import shutil
+from pathlib import Path
+
+from ttgen.tabletop_generator.assets import process_map, replacing
+
+
+DEFAULT_MAX_TEXTURE = 4096
+DEFAULT_QUALITY = 85
+
+
+def optimize_image(source, output, max_texture, quality):
+    """
+    Writes the optimized `source` image into `output`.
+
+    Images larger than `max_texture` on either side are downscaled, keeping the
+    aspect ratio. JPEGs are recompressed with the given quality, other formats
+    are written as optimized PNGs (keeping transparency). The source is copied
+    as is when that doesn't make it smaller.
+    """
+    try:
+        from PIL import Image
+    except ImportError:
+        raise RuntimeError("Image optimization requires Pillow (pip install Pillow).")
+
+    output = Path(output)
+    output.parent.mkdir(parents=True, exist_ok=True)
+    # Processes of concurrent builds sharing the cache may optimize the same image.
+    with replacing(output) as tmp_output:
+        with Image.open(source) as image:
+            resized = max(image.size) > max_texture
+            if resized:
+                image.thumbnail((max_texture, max_texture), Image.LANCZOS)
+            if output.suffix == ".jpg":
+                image.convert("RGB").save(tmp_output, "JPEG", quality=quality, optimize=True)
+            else:
+                image.save(tmp_output, "PNG", optimize=True)
+
+        if not resized and tmp_output.stat().st_size >= Path(source).stat().st_size:
+            shutil.copyfile(source, tmp_output)
+    return output
+
+
+class ImageOptimizer:
+    """
+    Collects the images to optimize and processes them in parallel.
+
+    :param output_dir: Where the optimized images are stored.
+    :param max_texture: Default maximum texture size, in pixels.
+    :param quality: JPEG quality.
+    """
+
+    def __init__(self, output_dir, max_texture=DEFAULT_MAX_TEXTURE, quality=DEFAULT_QUALITY):
+        self.output_dir = Path(output_dir)
+        self.max_texture = max_texture
+        self.quality = quality
+        self._outputs = {}
+
+    def get_settings(self):
+        return f"max_texture={self.max_texture},quality={self.quality}"
+
+    def add(self, source, max_texture=None):
+        """
+        Registers an image to optimize, with an optional per-component maximum
+        texture size. An image used by several components is optimized once
+        per maximum texture size.
+        """
+        from ttgen.tabletop_generator.build_cache import file_digest
+
+        max_texture = max_texture or self.max_texture
+        suffix = ".jpg" if source.suffix.lower() in (".jpg", ".jpeg") else ".png"
+        output = self.output_dir / f"{file_digest(source)}-{max_texture}-{self.quality}{suffix}"
+        self._outputs[source, max_texture] = output
+
+    def get(self, source, max_texture=None):
+        """
+        Returns the optimized image filename for the given source and maximum
+        texture size, None if it wasn't registered.
+        """
+        return self._outputs.get((source, max_texture or self.max_texture))
+
+    def run(self, jobs=None):
+        """
+        Optimizes the registered images missing from the output directory.
+        """
+        pending = [
+            (source, output, max_texture, self.quality)
+            for (source, max_texture), output in self._outputs.items()
+            if not output.is_file()
+        ]
+        process_map(optimize_image, pending, jobs)
+
+    def report(self):
+        """
+        Returns (number of images, source bytes, optimized bytes). A source
+        optimized for several maximum texture sizes is counted once.
+        """
+        source_bytes = sum(i.stat().st_size for i in {i for i, _ in self._outputs})
+        optimized_bytes = sum(i.stat().st_size for i in self._outputs.values())
+        return len(self._outputs), source_bytes, optimized_bytes
@@ -0,0 +1,169 @@
+"""
+Importer: turns a tabletop-simulator save back into a ttgen spec.
+
+Only the objects with a matching ttgen component are imported (see
+`IMPORTERS`), everything else is left out of the spec. Image urls are kept as
+they are, so the spec compiles without any local image.
+"""
+import re
+from dataclasses import fields, is_dataclass
+
+from ttgen.dataclass_ import Point3D
+from ttgen.tabletop_generator import components
+
+
+# Decimals kept on the imported positions and rotations.
+PRECISION = 4
+
+
+def import_deck(obj):
+    """
+    DeckCustom: one Deck per CustomDeck sheet, ttgen decks having a single
+    face image.
+    """
+    result = []
+    for i_deck_id, i_custom_deck in obj.CustomDeck.items():
+        count = sum(1 for i in obj.DeckIDs if i // 100 == int(i_deck_id))
+        result.append(
+            components.Deck(
+                name=_get_name(obj, i_custom_deck.FaceURL),
+                position=_import_position(obj),
+                face_url=i_custom_deck.FaceURL,
+                back_url=i_custom_deck.BackURL,
+                num_dim=f"{i_custom_deck.NumWidth}x{i_custom_deck.NumHeight}",
+                count=count,
+            )
+        )
+    return result
+
+
+def import_board(obj):
+    """
+    Custom_Board and Custom_Tile: a Board, with or without border. Tiles
+    scale is set by the Board itself.
+    """
+    border = obj.Name == "Custom_Board"
+    result = components.Board(
+        name=_get_name(obj, obj.CustomImage.ImageURL),
+        position=_import_position(obj),
+        image_url=obj.CustomImage.ImageURL,
+        border=border,
+    )
+    # Boards are rotated 180 degrees on generation.
+    result.rotation.y = _round(obj.Transform.rotY - 180.0)
+    if border:
+        result.scale = Point3D(
+            obj.Transform.scaleX, obj.Transform.scaleY, obj.Transform.scaleZ,
+        )
+    return [result]
+
+
+def import_token_stack(obj):
+    return [
+        components.TokenStack(
+            name=_get_name(obj, obj.CustomImage.ImageURL),
+            position=_import_position(obj),
+            image_url=obj.CustomImage.ImageURL,
+            count=obj.Number,
+        )
+    ]
+
+
+def import_model(obj):
+    # Skip the table top generated for FlexTable.
+    if obj.CustomMesh.MeshURL == components.FlexTable.MESH_URL:
+        return []
+    return [
+        components.Model(
+            name=_get_name(obj, obj.CustomMesh.DiffuseURL),
+            position=_import_position(obj),
+            mesh_url=obj.CustomMesh.MeshURL,
+            diffuse_url=obj.CustomMesh.DiffuseURL,
+            collide_url=obj.CustomMesh.ColliderURL,
+        )
+    ]
+
+
+IMPORTERS = {
+    "DeckCustom": import_deck,
+    "Custom_Board": import_board,
+    "Custom_Tile": import_board,
+    "Custom_Token_Stack": import_token_stack,
+    "Custom_Model": import_model,
+}
+
+
+def import_save(ttsim):
+    """
+    Creates the spec for the given save.
+
+    Components are named after the objects nickname (eg.: Level 1 becomes
+    level_1), or their image file name when they have none. The spec
+    always gets a FlexTable, which the layout requires.
+
+    :param TabletopSimulator ttsim:
+    :return dict: The spec, ready to be dumped as YAML.
+    """
+    result = {
+        "name": ttsim.SaveName,
+        "players": {"__class__": "TwoPlayers"},
+        "components": {"table": {"__class__": "FlexTable"}},
+    }
+
+    spec_components = result["components"]
+    for i_obj in ttsim.ObjectStates:
+        importer = IMPORTERS.get(i_obj.Name)
+        if importer is None:
+            continue
+        for i_component in importer(i_obj):
+            name = _unique_name(spec_components, i_component.name or i_component._prefix)
+            spec_components[name] = get_component_spec(i_component)
+    return result
+
+
+def get_component_spec(component):
+    """
+    Returns the spec of the given component: its class and the fields that
+    differ from the defaults.
+    """
+    result = {"__class__": component.__class__.__name__}
+    default = component.__class__()
+    for i_field in fields(component):
+        if i_field.name == "name":
+            continue
+        value = getattr(component, i_field.name)
+        if value == getattr(default, i_field.name):
+            continue
+        if is_dataclass(value):
+            # Points are written whole, missing coordinates load as zero.
+            value = {j.name: getattr(value, j.name) for j in fields(value)}
+        result[i_field.name] = value
+    return result
+
+
+def _get_name(obj, url):
+    if obj.Nickname:
+        return obj.Nickname
+    from urllib.parse import unquote
+
+    # The url file name, without query nor extension.
+    return unquote(url.split("?")[0].replace("\\", "/").split("/")[-1].rsplit(".", 1)[0])
+
+
+def _import_position(obj):
+    # Table coordinates: ttgen `y` is tabletop-simulator `posZ`.
+    return Point3D(_round(obj.Transform.posX), _round(obj.Transform.posZ), 0.0)
+
+
+def _round(value):
+    return round(value, PRECISION) + 0.0  # Avoids -0.0
+
+
+def _unique_name(spec_components, name):
+    name = re.sub(r"[^0-9a-z]+", "_", name.lower()).strip("_") or "component"
+    result = name
+    suffix = 1
+    while result in spec_components:
+        suffix += 1
+        result = f"{name}_{suffix}"
+    return result
@@ -1,16 +1,94 @@
 from dataclasses import dataclass, field
-from typing import List
+from typing import Any, List
 
 from ttgen.dataclass_ import RgbType, Point3D
+from ttgen.geometry import Rect
 from ttgen.tabletop_generator.annotations import Annotations
-from ttgen.tabletop_generator.components import _Base
+from ttgen.tabletop_generator.components import Schemas, _Base
 
 
 @dataclass
 class Layout(_Base):
+    """
+    A node of the layout tree.
+
+    Layouts are applied in two passes (see `apply`): the node sizes are
+    measured bottom-up and cached, then the nodes are placed top-down from the
+    cached sizes, so each node is measured once whatever the tree depth.
+    Changing a node field drops the cached sizes of the node and its parents
+    (see `invalidate`).
+    """
+
+    items: List[Any] = field(default_factory=list)
+    annotations: Annotations = field(default_factory=Annotations)
+
+    # The cached (width, height) and the parent node, not dataclass fields.
+    _size = None
+    _parent = None
+
+    def __setattr__(self, name, value):
+        super().__setattr__(name, value)
+        if name.startswith("_"):
+            return
+        if name == "items":
+            for i_item in value:
+                if isinstance(i_item, Layout):
+                    i_item._parent = self
+        self.invalidate()
+
+    def apply(self, x, y):
+        """
+        Measures the tree, then places it centered on the given position.
+        """
+        self.measure()
+        self.set_position(x, y)
+
+    def measure(self):
+        """
+        Returns the (width, height) of the node, cached until invalidated.
+        """
+        if self._size is None:
+            self._size = self._measure()
+        return self._size
+
+    def _measure(self):
+        raise NotImplementedError()
+
+    def invalidate(self):
+        """
+        Drops the cached size of the node and its parents. Call it after
+        changing the node `items` in place.
+        """
+        node = self
+        # A measured node has all its children measured, so the parents of an
+        # unmeasured node are unmeasured too.
+        while node is not None and node._size is not None:
+            node._size = None
+            node = node._parent
+
+    def invalidate_component(self, component):
+        """
+        Invalidates the nodes referencing the given component, to be called
+        after changing it in place.
+        """
+        for i_item in self.items:
+            i_item.invalidate_component(component)
+        if any(i is component for i in self.get_references()):
+            self.invalidate()
+
+    def get_references(self):
+        """
+        Returns the components the node refers to.
+        """
+        return []
+
+    @property
+    def width(self):
+        return self.measure()[0]
 
-    items: List = field(default_factory=list)
-    annotations: Annotations = Annotations()
+    @property
+    def height(self):
+        return self.measure()[1]
 
     def set_position(self, x, y):
         raise NotImplementedError()
@@ -19,15 +97,24 @@ class Layout(_Base):
         pass
 
     @classmethod
-    def create_layout(cls, d: dict, components: dict) -> object:
+    def create_layout(cls, d: dict, components: dict, annotations=None) -> object:
+        """
+        Creates the layout tree described by the given dict.
+
+        :param annotations: The annotations shared by the layout tree nodes,
+            a new one for the root node.
+        """
         layout_class = d.pop("__class__")
         try:
             class_ = globals()[layout_class]
         except KeyError:
             raise TypeError(f"Invalid layout class: {layout_class}.")
 
-        result = class_.schema().load(d)
-        result.items = [cls.create_layout(i, components) for i in result.items]
+        result = Schemas.load(class_, d)
+        result.annotations = Annotations() if annotations is None else annotations
+        result.items = [
+            cls.create_layout(i, components, result.annotations) for i in result.items
+        ]
         result.initialize(components)
         return result
 
@@ -54,25 +141,20 @@ class OpenDeck(Layout):
             cur_x += (self.deck_width + self.margin)
 
         self.annotations.add_box(
-            x=x - (self.width / 2.0),
-            y=y - (self.height / 2.0),
-            w=self.width,
-            h=self.height,
+            *Rect.centered(x, y, self.width, self.height),
             color=RgbType(1.0, 0.85, 0.95),
         )
 
     def initialize(self, components):
         self.deck = components[f'deck:{self.deck}']
 
-    @property
-    def width(self):
-        result = self.deck_width * (self.count + 1)
-        result += self.margin * self.count
-        return result
+    def get_references(self):
+        return [self.deck]
 
-    @property
-    def height(self):
-        return 3.2
+    def _measure(self):
+        width = self.deck_width * (self.count + 1)
+        width += self.margin * self.count
+        return width, 3.2
 
 
 
@@ -91,13 +173,9 @@ class VerticalBox(Layout):
             i_item.set_position(x, cur_y + (h / 2.0))
             cur_y += h + self.margin
 
-    @property
-    def width(self):
-        return max(i.width for i in self.items)
-
-    @property
-    def height(self):
-        return sum(i.height for i in self.items)
+    def _measure(self):
+        sizes = [i.measure() for i in self.items]
+        return max(i[0] for i in sizes), sum(i[1] for i in sizes)
 
 
 @dataclass
@@ -115,13 +193,9 @@ class HorizontalBox(Layout):
             i_item.set_position(cur_x + (w / 2.0), y)
             cur_x += w + self.margin
 
-    @property
-    def width(self):
-        return sum(i.width for i in self.items)
-
-    @property
-    def height(self):
-        return max(i.height for i in self.items)
+    def _measure(self):
+        sizes = [i.measure() for i in self.items]
+        return sum(i[0] for i in sizes), max(i[1] for i in sizes)
 
 
 @dataclass
@@ -135,10 +209,172 @@ class LayoutItem(Layout):
     def initialize(self, components):
         self.ref = components[self.ref]
 
-    @property
-    def width(self):
-        return self.ref.width
+    def get_references(self):
+        return [self.ref]
 
-    @property
-    def height(self):
-        return self.ref.height
+    def _measure(self):
+        return self.ref.width, self.ref.height
+
+
+@dataclass
+class _Cells(Layout):
+    """
+    Base of the containers placing many cells at once: the `items` layouts,
+    followed by the components named in `refs`, placed without a `LayoutItem`
+    node each. Every cell gets a snap point, and a box when `boxes` is set,
+    added in bulk.
+    """
+
+    margin: float = 0.4
+    boxes: bool = False
+
+    # References
+    refs: List[Any] = field(default_factory=list)
+
+    def initialize(self, components):
+        self.refs = [components[i] for i in self.refs]
+
+    def get_references(self):
+        return list(self.refs)
+
+    def _get_sizes(self):
+        result = [i.measure() for i in self.items]
+        result += [(i.width, i.height) for i in self.refs]
+        return result
+
+    def _place(self, positions, sizes):
+        """
+        Places the cells centered on the given positions, extra positions
+        being empty cells.
+        """
+        count = len(self.items)
+        for i_item, (x, y) in zip(self.items, positions):
+            i_item.set_position(x, y)
+        for i_component, (x, y) in zip(self.refs, positions[count:]):
+            i_component.position = Point3D(x, y)
+
+        self.annotations.add_snap_points(positions)
+        if self.boxes:
+            self.annotations.add_boxes(
+                [Rect.centered(x, y, w, h) for (x, y), (w, h) in zip(positions, sizes)],
+                color=RgbType(1.0, 0.85, 0.95),
+            )
+
+
+@dataclass
+class Grid(_Cells):
+    """
+    Places the cells row by row on a grid of `columns` columns, every cell
+    the size of the largest one unless `cell_width`/`cell_height` are given.
+    Empty cells get snap points too, so a grid with no items lays out a snap
+    grid for the tiles placed during the game.
+    """
+
+    columns: int = 1
+    # 0 for as many rows as the cells need.
+    rows: int = 0
+    cell_width: float = 0.0
+    cell_height: float = 0.0
+
+    def initialize(self, components):
+        super().initialize(components)
+        count = len(self.items) + len(self.refs)
+        if self.columns < 1:
+            raise ValueError(f"Invalid grid columns: {self.columns}.")
+        if self.rows and count > self.columns * self.rows:
+            raise ValueError(
+                f"Too many cells for a {self.columns}x{self.rows} grid: {count}."
+            )
+
+    def get_rows(self):
+        count = len(self.items) + len(self.refs)
+        return self.rows or max(1, -(-count // self.columns))
+
+    def _get_cell_size(self):
+        sizes = self._get_sizes()
+        return (
+            self.cell_width or max((i[0] for i in sizes), default=0.0),
+            self.cell_height or max((i[1] for i in sizes), default=0.0),
+        )
+
+    def _measure(self):
+        cell_width, cell_height = self._get_cell_size()
+        rows = self.get_rows()
+        return (
+            self.columns * cell_width + (self.columns - 1) * self.margin,
+            rows * cell_height + (rows - 1) * self.margin,
+        )
+
+    def set_position(self, x, y):
+        cell_width, cell_height = self._get_cell_size()
+        width, height = self.measure()
+
+        # The column and row centers are computed once for the whole grid.
+        left = x - (width / 2.0) + (cell_width / 2.0)
+        top = y - (height / 2.0) + (cell_height / 2.0)
+        xs = [left + i * (cell_width + self.margin) for i in range(self.columns)]
+        ys = [top + i * (cell_height + self.margin) for i in range(self.get_rows())]
+        positions = [(i_x, i_y) for i_y in ys for i_x in xs]
+        self._place(positions, [(cell_width, cell_height)] * len(positions))
+
+
+@dataclass
+class Flow(_Cells):
+    """
+    Places the cells left to right, wrapping to a new row when the next one
+    doesn't fit in `max_width`, the `FlexTable` width when 0.
+    """
+
+    max_width: float = 0.0
+
+    def initialize(self, components):
+        from ttgen.tabletop_generator.components import FlexTable
+
+        super().initialize(components)
+        if not self.max_width:
+            table = components.get("table")
+            if not isinstance(table, FlexTable):
+                table = FlexTable
+            self.max_width = table.table_width
+
+    def _flow(self, sizes):
+        """
+        :return: (positions relative to the top-left corner, width, height)
+        """
+        positions = []
+        width = height = 0.0
+        row = []
+        row_width = 0.0
+
+        def _end_row():
+            nonlocal width, height
+            if positions:
+                height += self.margin
+            row_height = max(i[1] for i in row)
+            cur_x = 0.0
+            for w, _h in row:
+                positions.append((cur_x + (w / 2.0), height + (row_height / 2.0)))
+                cur_x += w + self.margin
+            width = max(width, row_width)
+            height += row_height
+
+        for i_size in sizes:
+            if row and row_width + self.margin + i_size[0] > self.max_width:
+                _end_row()
+                row, row_width = [], 0.0
+            row_width += i_size[0] + (self.margin if row else 0.0)
+            row.append(i_size)
+        if row:
+            _end_row()
+        return positions, width, height
+
+    def _measure(self):
+        _positions, width, height = self._flow(self._get_sizes())
+        return width, height
+
+    def set_position(self, x, y):
+        sizes = self._get_sizes()
+        positions, width, height = self._flow(sizes)
+        left = x - (width / 2.0)
+        top = y - (height / 2.0)
+        self._place([(left + i_x, top + i_y) for i_x, i_y in positions], sizes)
@@ -1,10 +1,40 @@
-from dataclasses import dataclass
+import math
+from dataclasses import dataclass, field, replace
+from typing import List
 
-from ttgen.tabletop_simulator import TabletopHandTransform, TabletopTransform
+from ttgen.dataclass_ import Point3D
+from ttgen.tabletop_simulator import TabletopHandTransform, TabletopTabState, TabletopTransform
 from .components import _Base
 
+
+# The seat colors, from the tabletop-simulator tabs, Grey last.
+PLAYER_COLORS = [
+    i.color for i in sorted(
+        TabletopTabState.default_container().values(),
+        key=lambda x: (x.color == "Grey", x.id),
+    )
+]
+
+
+@dataclass
+class _BasePlayers(_Base):
+
+    def seat(self, components):
+        """
+        Seats the players at the table.
+
+        :param components: The spec components, by key.
+        :return: The components, with the per-player ones replaced by their
+            copies for each seat.
+        """
+        return components
+
+    def generate(self):
+        raise NotImplementedError()
+
+
 @dataclass
-class TwoPlayers(_Base):
+class TwoPlayers(_BasePlayers):
 
     def generate(self):
         table_x = 18.0
@@ -40,3 +70,161 @@ class TwoPlayers(_Base):
             )
         ]
         return result
+
+
+@dataclass
+class Players(_BasePlayers):
+    """
+    Seats `count` players (2 to 12) around the table edges, the seats shared
+    among the edges by their length and spread evenly along each one, counter
+    clockwise from the bottom edge.
+
+    The components listed in `components` (eg.: board:player_board) are
+    replicated for each seat, named after the seat color (eg.:
+    player_board_red) and sharing the template images. Their position and
+    rotation are relative to the seat: x to the player's right and y towards
+    the table center.
+    """
+
+    count: int = 2
+    # The seat colors, the first `count` of `PLAYER_COLORS` when empty.
+    colors: List[str] = field(default_factory=list)
+    hand_width: float = 12.0
+    hand_height: float = 6.0
+    hand_depth: float = 6.0
+
+    # References
+    components: List[str] = field(default_factory=list)
+
+    # The table (half) width and height, see `seat`.
+    _table_size = (18.0, 18.0)
+
+    def get_colors(self):
+        if not 2 <= self.count <= len(PLAYER_COLORS):
+            raise ValueError(f"Invalid players count: {self.count}.")
+        result = self.colors or PLAYER_COLORS[:self.count]
+        if len(result) != self.count:
+            raise ValueError(f"Expected {self.count} player colors, got {len(result)}.")
+        for i_color in result:
+            if i_color not in PLAYER_COLORS:
+                raise ValueError(f"Invalid player color: {i_color}.")
+        return result
+
+    def seat(self, components):
+        from ttgen.tabletop_generator.components import FlexTable
+
+        missing = set(self.components).difference(components)
+        if missing:
+            raise KeyError(f"Invalid per-player components: {', '.join(sorted(missing))}.")
+
+        table = components.get("table")
+        if isinstance(table, FlexTable):
+            self._table_size = (table.table_width, table.table_height)
+
+        seats = self.get_seats()
+        result = type(components)()
+        for i_key, i_component in components.items():
+            if i_key not in self.components:
+                result[i_key] = i_component
+                continue
+            for j_color, j_x, j_y, j_rotation, _j_width in seats:
+                copy = self._replicate(i_component, j_color, j_x, j_y, j_rotation)
+                result[copy.get_key()] = copy
+        return result
+
+    def get_seats(self):
+        """
+        Returns the (color, x, y, rotation, hand width) of each seat, the hand
+        centered on (x, y) facing the table center.
+
+        The corner squares (`hand_depth` wide) are left free, so the hands of
+        adjacent edges never overlap.
+        """
+        width, height = self._table_size
+        colors = self.get_colors()
+
+        # Edges as (center x, center y, direction x, direction y, half length
+        # without the corners, rotation), counter clockwise from the bottom.
+        inset_x = width - (self.hand_depth / 2.0)
+        inset_y = height - (self.hand_depth / 2.0)
+        half_x = width - self.hand_depth
+        half_y = height - self.hand_depth
+        edges = [
+            (0.0, -inset_y, 1.0, 0.0, half_x, 0.0),
+            (inset_x, 0.0, 0.0, 1.0, half_y, 270.0),
+            (0.0, inset_y, -1.0, 0.0, half_x, 180.0),
+            (-inset_x, 0.0, 0.0, -1.0, half_y, 90.0),
+        ]
+        counts = self._share_seats([i[4] for i in edges])
+
+        # Seat offsets along each edge, in [-1, 1], computed in one pass.
+        offsets = [
+            (i_edge, (2.0 * (j + 0.5) / i_count) - 1.0, i_count)
+            for i_edge, i_count in zip(edges, counts)
+            for j in range(i_count)
+        ]
+        return [
+            (
+                i_color,
+                i_x + i_dx * i_offset * i_half,
+                i_y + i_dy * i_offset * i_half,
+                i_rotation,
+                min(self.hand_width, 2.0 * i_half / i_count),
+            )
+            for i_color, ((i_x, i_y, i_dx, i_dy, i_half, i_rotation), i_offset, i_count)
+            in zip(colors, offsets)
+        ]
+
+    def _share_seats(self, lengths):
+        """
+        Shares the seats among the edges by their length, largest remainder
+        first; ties go to the bottom, then top, left and right edges.
+        """
+        total = sum(lengths)
+        quotas = [self.count * i / total for i in lengths]
+        result = [int(i) for i in quotas]
+        priority = {0: 0, 2: 1, 3: 2, 1: 3}
+        remainders = sorted(
+            range(len(lengths)),
+            key=lambda i: (result[i] - quotas[i], priority[i]),
+        )
+        for i in remainders[:self.count - sum(result)]:
+            result[i] += 1
+        return result
+
+    def _replicate(self, component, color, x, y, rotation):
+        angle = math.radians(rotation)
+        cos, sin = math.cos(angle), math.sin(angle)
+        local = component.position
+        return replace(
+            component,
+            name=f"{component.name}_{color.lower()}",
+            image_name=component.image_name or component.name,
+            position=Point3D(
+                x + (local.x * cos) + (local.y * sin),
+                y - (local.x * sin) + (local.y * cos),
+                local.z,
+            ),
+            rotation=Point3D(
+                component.rotation.x,
+                component.rotation.y + rotation,
+                component.rotation.z,
+            ),
+        )
+
+    def generate(self):
+        return [
+            TabletopHandTransform(
+                Color=i_color,
+                Transform=TabletopTransform(
+                    posX=i_x,
+                    posY=3.24,
+                    posZ=i_y,
+                    rotY=i_rotation,
+                    scaleX=i_width,
+                    scaleY=self.hand_height,
+                    scaleZ=self.hand_depth,
+                )
+            )
+            for i_color, i_x, i_y, i_rotation, i_width in self.get_seats()
+        ]
@@ -7,6 +7,16 @@ from ttgen.dataclass_ import Point3D, RgbType
 
 class _TabletopBase:
 
+    _shared = False
+
+    def share(self):
+        """
+        Marks the object as shared by several objects (eg.: the CustomImage of
+        the copies of a component), so the JSON writer renders it once.
+        """
+        self._shared = True
+        return self
+
     @classmethod
     def from_dict(cls, **d):
         from ttgen.dataclass_ import dataclass_from_dict
@@ -17,7 +27,7 @@ class _TabletopBase:
 class TabletopGrid(_TabletopBase):
     Type: int = 0
     Lines: bool = False
-    Color: RgbType = RgbType()
+    Color: RgbType = field(default_factory=RgbType)
     Opacity: float = 0.75
     ThickLines: bool = False
     Snapping: bool = False
@@ -25,18 +35,18 @@ class TabletopGrid(_TabletopBase):
     BothSnapping: bool = False
     xSize: float = 2.0
     ySize: float = 2.0
-    PosOffset: Point3D = Point3D(x=0.0, y=1.0, z=0.0)
+    PosOffset: Point3D = field(default_factory=lambda: Point3D(x=0.0, y=1.0, z=0.0))
 
 
 @dataclass
 class TabletopLighting(_TabletopBase):
     LightIntensity: float = 0.54
-    LightColor: RgbType = RgbType(1.0, 0.9804, 0.8902)
+    LightColor: RgbType = field(default_factory=lambda: RgbType(1.0, 0.9804, 0.8902))
     AmbientIntensity: float = 1.3
     AmbientType: int = 0
-    AmbientSkyColor: RgbType = RgbType(0.5, 0.5, 0.5)
-    AmbientEquatorColor: RgbType = RgbType(0.5, 0.5, 0.5)
-    AmbientGroundColor: RgbType = RgbType(0.5, 0.5, 0.5)
+    AmbientSkyColor: RgbType = field(default_factory=lambda: RgbType(0.5, 0.5, 0.5))
+    AmbientEquatorColor: RgbType = field(default_factory=lambda: RgbType(0.5, 0.5, 0.5))
+    AmbientGroundColor: RgbType = field(default_factory=lambda: RgbType(0.5, 0.5, 0.5))
     ReflectionIntensity: float = 1.0
     LutIndex: int = 0
     LutContribution: float = 1.0
@@ -58,7 +68,7 @@ class TabletopTransform(_TabletopBase):
 @dataclass
 class TabletopHandTransform(_TabletopBase):
     Color: str = ""
-    Transform: TabletopTransform = TabletopTransform()
+    Transform: TabletopTransform = field(default_factory=TabletopTransform)
 
 
 @dataclass
@@ -82,13 +92,13 @@ class TabletopTurns(_TabletopBase):
 
 @dataclass
 class AttachedSnapPoint(_TabletopBase):
-    Position: Point3D = Point3D()
+    Position: Point3D = field(default_factory=Point3D)
 
 
 @dataclass
 class AttachedVectorLine(_TabletopBase):
     points3: List[Point3D] = field(default_factory=Point3D)
-    color: RgbType = RgbType()
+    color: RgbType = field(default_factory=RgbType)
     thickness: float = 0.1
     loop: bool = True
 
@@ -96,10 +106,10 @@ class AttachedVectorLine(_TabletopBase):
 @dataclass
 class TabletopObjectState(_TabletopBase):
     Name: str = 0
-    Transform: TabletopTransform = TabletopTransform()
+    Transform: TabletopTransform = field(default_factory=TabletopTransform)
     Nickname: str = ""
     Description: str = ""
-    ColorDiffuse: RgbType = RgbType(1.0, 1.0, 1.0)
+    ColorDiffuse: RgbType = field(default_factory=lambda: RgbType(1.0, 1.0, 1.0))
     Locked: bool = False
     Grid: bool = True
     Snap: bool = True
@@ -135,7 +145,7 @@ class TabletopCustomAssetBundle(TabletopObjectState):
         LoopingEffectIndex: int = 0
 
     Name: str = "Custom_Assetbundle"
-    CustomAssetbundle: CustomAssetBundleField = CustomAssetBundleField()
+    CustomAssetbundle: CustomAssetBundleField = field(default_factory=CustomAssetBundleField)
 
 
 @dataclass
@@ -146,7 +156,7 @@ class TabletopCustomModel(TabletopObjectState):
 
         @dataclass
         class CustomShaderField(_TabletopBase):
-            SpecularColor: RgbType = RgbType(1, 1, 1)
+            SpecularColor: RgbType = field(default_factory=lambda: RgbType(1, 1, 1))
             SpecularIntensity: float = 0.0
             SpecularSharpness: float = 2.0
             FresnelStrength: float = 0.0
@@ -160,11 +170,11 @@ class TabletopCustomModel(TabletopObjectState):
         MaterialIndex: int = 0
         TypeIndex: int = 0
 
-        CustomShader: CustomShaderField = CustomShaderField()
+        CustomShader: CustomShaderField = field(default_factory=CustomShaderField)
         CastShadows: bool = True
 
     Name: str = "Custom_Model"
-    CustomMesh: CustomMeshField = CustomMeshField()
+    CustomMesh: CustomMeshField = field(default_factory=CustomMeshField)
 
 
 @dataclass
@@ -188,7 +198,7 @@ class TabletopCustomTokenStack(TabletopObjectState):
     MaterialIndex: int = -1
     MeshIndex: int = 1
     Number: int = 6
-    CustomImage: TabletopCustomImage = TabletopCustomImage()
+    CustomImage: TabletopCustomImage = field(default_factory=TabletopCustomImage)
 
 
 # Deck
@@ -201,6 +211,52 @@ class TabletopCard(TabletopObjectState):
     SidewaysCard: bool = False
 
 
+class TabletopCardList:
+    """
+    The cards of a deck as compact rows of `FIELDS` values, the other card
+    fields holding their defaults.
+
+    Used as a deck `ContainedObjects`, the cards are expanded into JSON text
+    by the JSON writer, without creating a `TabletopCard` per card.
+    """
+
+    __slots__ = ("rows",)
+
+    FIELDS = ("CardID", "GUID", "Nickname", "Description", "LuaScriptState")
+
+    def __init__(self, rows=()):
+        self.rows = list(rows)
+
+    def __len__(self):
+        return len(self.rows)
+
+    def __iter__(self):
+        return iter(self.expand())
+
+    def __eq__(self, other):
+        if isinstance(other, TabletopCardList):
+            return self.rows == other.rows
+        return self.expand() == other
+
+    def __repr__(self):
+        return f"TabletopCardList({self.rows!r})"
+
+    def expand(self):
+        """
+        Returns the `TabletopCard` of each row.
+        """
+        return [TabletopCard(**dict(zip(self.FIELDS, i))) for i in self.rows]
+
+    def with_guids(self, gen_guid):
+        """
+        Returns a copy of the cards with new GUIDs, from the given function.
+        """
+        i_guid = self.FIELDS.index("GUID")
+        return TabletopCardList(
+            i[:i_guid] + (gen_guid(),) + i[i_guid + 1:] for i in self.rows
+        )
+
+
 @dataclass
 class TabletopCustomDeck(_TabletopBase):
     FaceURL: str = ""
@@ -222,7 +278,7 @@ class TabletopDeckCustom(TabletopObjectStateContainer):
 @dataclass
 class TabletopCustomTile(TabletopObjectStateContainer):
     Name: str = "Custom_Tile"
-    CustomImage: TabletopCustomImage = TabletopCustomImage()
+    CustomImage: TabletopCustomImage = field(default_factory=TabletopCustomImage)
 
 # Board
 
@@ -230,10 +286,10 @@ class TabletopCustomTile(TabletopObjectStateContainer):
 class TabletopCustomBoard(TabletopObjectState):
     Name: str = "Custom_Board"
     Locked: bool = False
-    Transform: TabletopTransform = TabletopTransform(posY=2.0, rotY=180.0)
-    ColorDiffuse: RgbType = RgbType(0.7867647, 0.7867647, 0.7867647)
+    Transform: TabletopTransform = field(default_factory=lambda: TabletopTransform(posY=2.0, rotY=180.0))
+    ColorDiffuse: RgbType = field(default_factory=lambda: RgbType(0.7867647, 0.7867647, 0.7867647))
     HideWhenFaceDown: bool = False
-    CustomImage: TabletopCustomImage = TabletopCustomImage()
+    CustomImage: TabletopCustomImage = field(default_factory=TabletopCustomImage)
 
 
 @dataclass
@@ -241,7 +297,7 @@ class TabletopTabState(_TabletopBase):
     title: str = ""
     body: str = ""
     color: str = "Black"  # PlayerColor
-    visibleColor: RgbType = RgbType()
+    visibleColor: RgbType = field(default_factory=RgbType)
     id: int = 0
 
     @classmethod
@@ -329,10 +385,10 @@ class TabletopSimulator(_TabletopBase):
     XmlUI: str = ""
     LuaScript: str = ""
     LuaScriptState: str = ""
-    Grid: TabletopGrid = TabletopGrid()
-    Lighting: TabletopLighting = TabletopLighting()
-    Hands: TabletopHands = TabletopHands()
-    Turns: TabletopTurns = TabletopTurns()
+    Grid: TabletopGrid = field(default_factory=TabletopGrid)
+    Lighting: TabletopLighting = field(default_factory=TabletopLighting)
+    Hands: TabletopHands = field(default_factory=TabletopHands)
+    Turns: TabletopTurns = field(default_factory=TabletopTurns)
     ObjectStates: List[TabletopObjectState] = field(default_factory=list)
     DecalPallet: List[str] = field(default_factory=list)
     TabStates: Dict[str, TabletopTabState] = field(
@@ -340,12 +396,65 @@ class TabletopSimulator(_TabletopBase):
     )
     VersionNumber: str = "v12.0.1"
 
-    def save(self, filename):
-        import json
-        from pprint import pprint
-
-        # pprint(self, width=120, indent=2)
-        contents = asdict(self)
-        pprint(contents, width=120, indent=2)
-        contents = json.dumps(contents, indent=2)
-        filename.write_text(contents)
+    @classmethod
+    def load(cls, filename):
+        """
+        Reads a save file (see `json_reader`).
+
+        :param filename: The save path.
+        :return TabletopSimulator:
+        """
+        from pathlib import Path
+        from ttgen.tabletop_simulator.json_reader import load
+
+        # Saves written by tabletop-simulator may start with a BOM.
+        with Path(filename).open(mode="r", encoding="utf-8-sig") as iss:
+            return load(iss, cls)
+
+    def save(self, filename, debug=False, compact=False, skip_defaults=False):
+        """
+        Writes the save file, streaming the JSON straight into the file.
+
+        :param filename: The destination path.
+        :param debug: Also pretty-prints the save contents on stdout.
+        :param compact: Writes minified JSON instead of indented.
+        :param skip_defaults: Leaves out fields holding their default empty
+            values, which tabletop-simulator fills in by itself.
+        :return bool: False if the file already had the same contents and was
+            left untouched.
+        """
+        import filecmp
+        import os
+        import stat
+        import tempfile
+        from ttgen.tabletop_simulator.json_writer import dump
+
+        if debug:
+            from pprint import pprint
+            pprint(asdict(self), width=120, indent=2)
+
+        # A unique temporary file, concurrent compiles may write the same save.
+        oss = tempfile.NamedTemporaryFile(
+            mode="w", dir=filename.parent, prefix=f"{filename.name}.", suffix=".tmp", delete=False
+        )
+        tmp_filename = oss.name
+        try:
+            with oss:
+                dump(self, oss, indent=None if compact else 2, skip_defaults=skip_defaults)
+            if filename.is_file() and filecmp.cmp(tmp_filename, filename, shallow=False):
+                return False
+            # Temporary files are private (0600): keep the mode of the save, or
+            # the default one for a new save.
+            if filename.is_file():
+                mode = stat.S_IMODE(filename.stat().st_mode)
+            else:
+                umask = os.umask(0)
+                os.umask(umask)
+                mode = 0o666 & ~umask
+            os.chmod(tmp_filename, mode)
+            os.replace(tmp_filename, filename)
+            tmp_filename = None
+            return True
+        finally:
+            if tmp_filename is not None:
+                os.unlink(tmp_filename)
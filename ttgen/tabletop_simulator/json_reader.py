@@ -0,0 +1,127 @@
+"""
+JSON reader for tabletop-simulator saves, the counterpart of `json_writer`.
+
+Parses a save into the tabletop-simulator dataclasses. Object states are
+created with the class matching their `Name` (eg.: DeckCustom creates a
+`TabletopDeckCustom`), falling back to `TabletopObjectState`. Keys without a
+matching dataclass field are dropped, since hand-built saves hold plenty of
+settings ttgen doesn't model.
+"""
+import json
+from dataclasses import fields, is_dataclass
+
+
+_LOADERS = {}
+_OBJECT_STATE_CLASSES = {}
+
+
+def load(fp, klass=None):
+    """
+    Reads a save (or any JSON value of the given dataclass type) from the file
+    handle.
+
+    :param klass: The dataclass to create, defaults to `TabletopSimulator`.
+    """
+    from ttgen.tabletop_simulator import TabletopSimulator
+
+    return get_loader(klass or TabletopSimulator)(json.load(fp))
+
+
+def get_object_state_class(name):
+    """
+    Returns the object state dataclass for the given tabletop-simulator object
+    `Name`, None if unknown.
+    """
+    from ttgen.tabletop_simulator import TabletopObjectState
+
+    if not _OBJECT_STATE_CLASSES:
+        pending = [TabletopObjectState]
+        while pending:
+            klass = pending.pop(0)
+            default = {i.name: i.default for i in fields(klass)}["Name"]
+            if isinstance(default, str):
+                _OBJECT_STATE_CLASSES.setdefault(default, klass)
+            pending += klass.__subclasses__()
+    return _OBJECT_STATE_CLASSES.get(name)
+
+
+def get_loader(klass):
+    """
+    Returns the function converting parsed JSON values into the given type,
+    building it on first use.
+    """
+    try:
+        return _LOADERS[klass]
+    except KeyError:
+        pass
+    except TypeError:  # Unhashable type annotation.
+        return _identity
+
+    from ttgen.tabletop_simulator import TabletopObjectState
+
+    origin = getattr(klass, "__origin__", None)
+    if klass is TabletopObjectState:
+        result = _object_state_loader(_dataclass_loader(klass))
+    elif is_dataclass(klass):
+        result = _dataclass_loader(klass)
+    elif origin is list and klass.__args__:
+        item_loader = get_loader(klass.__args__[0])
+
+        def result(d):
+            return [item_loader(i) for i in d]
+    elif origin is dict and klass.__args__:
+        value_loader = get_loader(klass.__args__[1])
+
+        def result(d):
+            return {i: value_loader(j) for i, j in d.items()}
+    else:
+        result = _identity
+
+    _LOADERS[klass] = result
+    return result
+
+
+def _identity(value):
+    return value
+
+
+def _object_state_loader(base_loader):
+    """
+    Dispatches the object states to the loader of their `Name` class.
+    """
+
+    def result(d):
+        if d.__class__ is not dict:
+            return d
+        klass = get_object_state_class(d.get("Name"))
+        if klass is None or klass is base_loader.klass:
+            return base_loader(d)
+        return get_loader(klass)(d)
+
+    return result
+
+
+def _dataclass_loader(klass):
+    field_loaders = {}
+
+    def result(d):
+        if d.__class__ is not dict:
+            return d
+        kwargs = {}
+        for key, value in d.items():
+            try:
+                loader = field_loaders[key]
+            except KeyError:
+                continue
+            kwargs[key] = value if loader is _identity else loader(value)
+        return klass(**kwargs)
+
+    result.klass = klass
+
+    # Registered before building the fields loaders to support recursive
+    # dataclasses.
+    _LOADERS[klass] = result
+    for i_field in fields(klass):
+        if i_field.init:
+            field_loaders[i_field.name] = get_loader(i_field.type)
+    return result
@@ -0,0 +1,216 @@
+"""
+Streaming JSON serializer for the tabletop-simulator dataclasses.
+
+Writes the same text as `json.dumps(asdict(obj), indent=indent)` straight into
+a file handle, walking the dataclass tree instead of copying it into dicts
+and a single string first.
+"""
+from dataclasses import MISSING, fields, is_dataclass
+from json.encoder import encode_basestring_ascii
+
+from ttgen.tabletop_simulator import TabletopCard, TabletopCardList
+
+
+_FIELDS = {}
+
+
+def _fields(klass):
+    """
+    Returns the (name, empty default) pairs of the dataclass fields. The empty
+    default is the field default when it is an empty string, list or dict, None
+    otherwise.
+    """
+    try:
+        return _FIELDS[klass]
+    except KeyError:
+        pass
+
+    result = []
+    for i_field in fields(klass):
+        if i_field.default_factory is not MISSING:
+            default = i_field.default_factory()
+        else:
+            default = i_field.default
+        if not (isinstance(default, (str, list, dict)) and len(default) == 0):
+            default = None
+        result.append((i_field.name, default))
+    result = _FIELDS[klass] = tuple(result)
+    return result
+
+
+def _float_str(value):
+    if value != value:
+        return "NaN"
+    if value == float("inf"):
+        return "Infinity"
+    if value == -float("inf"):
+        return "-Infinity"
+    return float.__repr__(value)
+
+
+def _get_marker(klass, index):
+    # A value standing for a card field in a card template, see `_dump_cards`.
+    if klass is int:
+        return -7919 * (index + 1), int.__repr__
+    return f"\0{index}\0", encode_basestring_ascii
+
+
+def dump(obj, fp, indent=2, skip_defaults=False):
+    """
+    Serializes the given dataclass (or plain JSON value) into the file handle.
+
+    :param indent: Indentation level, None writes minified JSON.
+    :param skip_defaults: Leaves out the dataclass fields holding their default
+        empty string, list or dict. Tabletop-simulator reads missing values as
+        empty, while its defaults for flags and numbers don't always match
+        ours, so these are always written.
+    """
+    write = fp.write
+    key_separator = ":" if indent is None else ": "
+
+    # The values marked as shared (eg.: the CustomImage of the copies of a
+    # component, see `_TabletopBase.share`) are rendered once into a string,
+    # then written from it. The values are kept with their text, so their ids
+    # can't be reused by other objects.
+    rendered = {}
+    # The card templates by (empty fields, level), see `_dump_cards`.
+    card_templates = {}
+
+    def _dump_items(items, level, opening, closing):
+        # Items are (key, value) pairs, key is None for lists.
+        separator = None
+        for key, value in items:
+            if separator is None:
+                if indent is None:
+                    separator = ""
+                else:
+                    separator = "\n" + " " * (indent * (level + 1))
+                write(opening + separator)
+            else:
+                write("," + separator)
+            if key is not None:
+                write(encode_basestring_ascii(key) + key_separator)
+            _dump(value, level + 1)
+
+        if separator is None:
+            write(opening + closing)
+        elif indent is None:
+            write(closing)
+        else:
+            write("\n" + " " * (indent * level) + closing)
+
+    def _dataclass_items(value):
+        for i_name, i_default in _fields(value.__class__):
+            result = getattr(value, i_name)
+            if skip_defaults and i_default is not None and result == i_default:
+                continue
+            yield i_name, result
+
+    def _dump_shared(value, level):
+        key = id(value), level
+        entry = rendered.get(key)
+        if entry is None or entry[0] is not value:
+            entry = rendered[key] = value, _render(value, level)
+        write(entry[1])
+
+    def _dump(value, level):
+        if isinstance(value, str):
+            write(encode_basestring_ascii(value))
+        elif value is None:
+            write("null")
+        elif value is True:
+            write("true")
+        elif value is False:
+            write("false")
+        elif isinstance(value, int):
+            write(int.__repr__(value))
+        elif isinstance(value, float):
+            write(_float_str(value))
+        elif getattr(value, "_shared", False):
+            _dump_shared(value, level)
+        else:
+            _dump_container(value, level)
+
+    def _render(value, level):
+        nonlocal write
+
+        parts = []
+        previous, write = write, parts.append
+        try:
+            _dump_container(value, level)
+        finally:
+            write = previous
+        return "".join(parts)
+
+    def _card_template(empty, level):
+        """
+        Renders a card with marker values for the fields of the card rows.
+
+        :param empty: The row fields that are empty (skipped), if any.
+        :return: (the text around the markers, (field index, encoder) of each
+            marker in the text)
+        """
+        values = {}
+        markers = []
+        for i, i_name in enumerate(TabletopCardList.FIELDS):
+            if empty is not None and empty[i]:
+                values[i_name] = ""
+                continue
+            default = TabletopCard.__dataclass_fields__[i_name].default
+            values[i_name], encoder = _get_marker(type(default), i)
+            markers.append((encoder(values[i_name]), i, encoder))
+
+        text = _render(TabletopCard(**values), level)
+        markers.sort(key=lambda x: text.index(x[0]))
+        segments = []
+        for i_marker, _i, _encoder in markers:
+            segment, text = text.split(i_marker, 1)
+            segments.append(segment)
+        segments.append(text)
+        return segments, [(i, j) for _marker, i, j in markers]
+
+    def _dump_cards(cards, level):
+        if not cards.rows:
+            write("[]")
+            return
+        if indent is None:
+            separator = ""
+        else:
+            separator = "\n" + " " * (indent * (level + 1))
+
+        # Each card is written from the template of its empty fields.
+        write("[" + separator)
+        for i_index, i_row in enumerate(cards.rows):
+            empty = tuple(i == "" for i in i_row) if skip_defaults else None
+            key = empty, level + 1
+            try:
+                segments, fields_ = card_templates[key]
+            except KeyError:
+                segments, fields_ = card_templates[key] = _card_template(empty, level + 1)
+
+            parts = [segments[0]]
+            for (j_field, j_encoder), j_segment in zip(fields_, segments[1:]):
+                parts.append(j_encoder(i_row[j_field]))
+                parts.append(j_segment)
+            if i_index:
+                write("," + separator)
+            write("".join(parts))
+
+        if indent is None:
+            write("]")
+        else:
+            write("\n" + " " * (indent * level) + "]")
+
+    def _dump_container(value, level):
+        if isinstance(value, TabletopCardList):
+            _dump_cards(value, level)
+        elif isinstance(value, (list, tuple)):
+            _dump_items(((None, i) for i in value), level, "[", "]")
+        elif isinstance(value, dict):
+            _dump_items(((str(i), j) for i, j in value.items()), level, "{", "}")
+        elif is_dataclass(value):
+            _dump_items(_dataclass_items(value), level, "{", "}")
+        else:
+            raise TypeError(f"Object of type {value.__class__.__name__} is not JSON serializable")
+
+    _dump(obj, 0)
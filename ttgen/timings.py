@@ -0,0 +1,36 @@
+"""
+Wall time per phase of a run, reported by `ttgen --timings`.
+"""
+import time
+from contextlib import contextmanager
+
+
+class Timings:
+    """
+    Accumulates the seconds spent in each phase (eg.: import, load, parse,
+    layout, generate, save), in the order the phases first ran.
+    """
+
+    def __init__(self):
+        self.phases = {}
+
+    @contextmanager
+    def phase(self, name):
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self.phases[name] = self.phases.get(name, 0.0) + time.perf_counter() - start
+
+    @contextmanager
+    def component(self, component):
+        """
+        Measures a component `generate`, only recorded by `Profiler`.
+        """
+        yield
+
+    def report(self):
+        """
+        Returns the (phase, seconds) rows.
+        """
+        return list(self.phases.items())
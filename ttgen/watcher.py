@@ -0,0 +1,119 @@
+"""
+Watch mode: recompiles a spec when it or its assets change.
+"""
+import os
+import time
+from pathlib import Path
+
+
+ASSET_DIRNAMES = ("decks", "boards", "tokenstacks")
+
+
+class Watcher:
+    """
+    Polls files and directories for changes.
+
+    Changes arriving less than `debounce` seconds apart are reported together
+    as a single batch.
+
+    :param paths: Files or directories (watched recursively).
+    :param interval: Seconds between polls.
+    :param debounce: Quiet seconds required before reporting a batch.
+    """
+
+    def __init__(self, paths, interval=0.2, debounce=0.3):
+        self.paths = [Path(i) for i in paths]
+        self.interval = interval
+        self.debounce = debounce
+        self._snapshot = self.snapshot()
+
+    def snapshot(self):
+        """
+        Returns the {filename: (mtime, size)} state of the watched files.
+        """
+        result = {}
+
+        def _scan(directory):
+            try:
+                entries = list(os.scandir(directory))
+            except OSError:
+                return
+            for i_entry in entries:
+                if i_entry.is_dir():
+                    _scan(i_entry.path)
+                else:
+                    stat = i_entry.stat()
+                    result[i_entry.path] = (stat.st_mtime_ns, stat.st_size)
+
+        for i_path in self.paths:
+            if i_path.is_dir():
+                _scan(i_path)
+            elif i_path.is_file():
+                stat = i_path.stat()
+                result[str(i_path)] = (stat.st_mtime_ns, stat.st_size)
+        return result
+
+    def poll(self):
+        """
+        Returns the files added, removed or modified since the last poll.
+        """
+        snapshot = self.snapshot()
+        previous, self._snapshot = self._snapshot, snapshot
+        return {
+            i for i in previous.keys() | snapshot.keys()
+            if previous.get(i) != snapshot.get(i)
+        }
+
+    def batches(self):
+        """
+        Yields the changed files, one set per batch of close changes. Runs
+        forever.
+        """
+        pending = set()
+        last_change = None
+        while True:
+            time.sleep(self.interval)
+            changes = self.poll()
+            if changes:
+                pending |= changes
+                last_change = time.monotonic()
+            elif pending and time.monotonic() - last_change >= self.debounce:
+                yield pending
+                pending = set()
+
+
+class WatchSession:
+    """
+    Keeps a parsed spec warm in the current process and recompiles it.
+
+    The spec is parsed again only when it changes. Asset changes compile the
+    parsed generator again, and the build cache limits the work to the
+    affected components.
+    """
+
+    def __init__(self, filename, output_dir=None):
+        self.filename = Path(filename)
+        self.output_dir = Path(output_dir) if output_dir else self.filename.parent
+        self._generator = None
+
+    def get_watched_paths(self):
+        return [self.filename] + [self.filename.parent / i for i in ASSET_DIRNAMES]
+
+    def rebuild(self, changes=()):
+        """
+        Recompiles the spec.
+
+        :param changes: The changed files, the spec is parsed again when
+            included (or not parsed yet).
+        :return float: The elapsed seconds.
+        """
+        from ttgen.cli import TabletopGenerator
+
+        start = time.perf_counter()
+        if self._generator is None or str(self.filename) in changes:
+            # Cleared first: when the spec fails to parse, the next rebuild
+            # parses it again instead of compiling the previous one.
+            self._generator = None
+            self._generator = TabletopGenerator(self.filename)
+        self._generator.compile(self.output_dir)
+        return time.perf_counter() - start